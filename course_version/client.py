@@ -1,16 +1,51 @@
 import asyncio
+import re
+import sys
+from pathlib import Path
+from typing import Dict, Optional
 
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
+from mcp.shared.memory import create_connected_server_and_client_session
 
 import os
-import json
 from google import genai
 from dotenv import load_dotenv
-from utils.utils import log_color
+
+# Only needed when run as a script; skip the realpath when the repo is already importable.
+if "utils" not in sys.modules:
+    REPO_ROOT = str(Path(__file__).resolve().parents[1])
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+
+from utils import fastjson
+from utils.async_input import AsyncLineReader
+from utils.deepseek import DeepseekRouter
+from utils.utils import LifecycleBatch, TOOL_NAMES, ToolCall, log_color
 
 load_dotenv()
 
+SERVER_PATH = Path(__file__).with_name("server.py")
+GEMINI_MODEL = "gemini-2.0-flash-001"
+TEARDOWN_TIMEOUT_SECONDS = 5.0
+COURSE_TOOLS = TOOL_NAMES
+
+# Field probes for Gemini replies that are not valid JSON (the prompt's example uses bare keys).
+TOOL_FIELD_RE = re.compile(r'"?tool_identified"?\s*:\s*"([^"]+)"')
+ARGUMENTS_FIELD_RE = re.compile(r'"?arguments"?\s*:\s*')
+QUOTED_VALUE_RE = re.compile(r'"([^"]*)"')
+
+# Used until the router is handed the live list from the server.
+DEFAULT_TOOLS_DESCRIPTION = """Tool - get_stock_price:
+Retrieve the current stock price for the given ticker symbol. Arguments: symbol
+
+Tool - compare_stocks:
+Compare the current stock prices of two ticker symbols. Arguments: symbol1, symbol2
+"""
+
+# The course server names its comparison arguments differently from the shared router.
+ARGUMENT_ALIASES = {"symbol_one": "symbol1", "symbol_two": "symbol2"}
+
 TOOL_IDENTIFIER_PROMPT = """
 
 You have been given access to the below MCP Server Tools
@@ -46,6 +81,118 @@ def fetch_tool_identifier_prompt():
   tool_identifier_prompt = TOOL_IDENTIFIER_PROMPT
   return tool_identifier_prompt
 
+class _BraceScanner:
+    """
+    Track ``{``/``}`` nesting across chunks of text, ignoring braces inside quoted strings.
+    """
+
+    def __init__(self) -> None:
+        self.depth = 0
+        self._opened = False
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, text: str) -> int:
+        """Consume ``text``; return the index just past the brace closing the outermost object, or -1."""
+        for index, char in enumerate(text):
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self.depth += 1
+                self._opened = True
+            elif char == "}":
+                self.depth -= 1
+                if self._opened and self.depth == 0:
+                    return index + 1
+        return -1
+
+def extract_tool_fields(raw: str) -> dict:
+    """
+    Pull ``tool_identified`` and ``arguments`` out of a reply that is not valid JSON.
+
+    Only the two fields the router needs are located; the ``arguments`` object is
+    cut out with a string-aware brace-depth scan and parsed on its own, while a quoted
+    ``"arg1, arg2"`` string is returned as-is for the caller to split.
+    """
+    tool_match = TOOL_FIELD_RE.search(raw)
+    args_match = ARGUMENTS_FIELD_RE.search(raw)
+    if tool_match is None or args_match is None:
+        raise ValueError("Gemini response did not include a tool and arguments.")
+
+    start = args_match.end()
+    if raw.startswith("{", start):
+        end = _BraceScanner().feed(raw[start:])
+        if end < 0:
+            raise ValueError("Gemini arguments object was not closed.")
+        arguments = fastjson.loads(raw[start:start + end])
+    else:
+        value_match = QUOTED_VALUE_RE.match(raw, start)
+        if value_match is None:
+            raise ValueError("Gemini arguments could not be read.")
+        arguments = value_match.group(1)
+
+    return {"tool_identified": tool_match.group(1), "arguments": arguments}
+
+def parse_tool_reply(raw: str) -> dict:
+    """
+    Turn a Gemini tool-identification reply into ``tool_identified``/``arguments``.
+
+    Code fences are stripped, the reply is parsed as JSON (or salvaged with
+    ``extract_tool_fields``), and ``"arg1, arg2"`` strings become a one-item dict.
+    """
+    raw = raw.strip()
+    raw = raw.replace("```json", "").replace("```","")
+    try:
+        data = fastjson.loads(raw)
+    except ValueError:
+        # Salvage the two fields we need instead of failing the whole route.
+        data = extract_tool_fields(raw)
+
+    if isinstance(data["arguments"], str):
+        args_list = [arg.strip() for arg in data["arguments"].split(",")]
+        data["arguments"] = {args_list[0]: args_list[1]} if len(args_list) > 1 else {args_list[0]: True}
+
+    return data
+
+def identify_tool(
+    user_query: str,
+    tools_description: str,
+    api_key: Optional[str] = None,
+    debug: bool = True,
+) -> dict:
+    """
+    Blocking core of ``generate_response``; see that function for the contract.
+    ``debug=False`` skips formatting the prompt and raw reply logs.
+    """
+    log_color(f"Routing query to Gemini for tool selection: {user_query}", "b", prefix="[model]")
+    if api_key is None:
+        api_key = os.getenv("GEMINI_API_KEY")
+    client = genai.Client(api_key=api_key)
+    
+    tool_identifier_prompt = fetch_tool_identifier_prompt()
+    tool_identifier_prompt = tool_identifier_prompt.format(user_query=user_query, tools_description=tools_description)
+
+    if debug:
+        log_color(f"Gemini prompt: {tool_identifier_prompt}", "d", prefix="[debug]")
+    response = client.models.generate_content(
+        model=GEMINI_MODEL, 
+        contents=tool_identifier_prompt
+    )
+    if debug:
+        log_color(f"Gemini response: {response}", "d", prefix="[debug]")
+    data = parse_tool_reply(response.text)
+    if debug:
+        log_color(f"Cleaned response: {data}", "d", prefix="[debug]")
+    log_color(f"Gemini identified tool {data.get('tool_identified','?')} with args {data.get('arguments',{})}", "b", prefix="[model]")
+    return data
+
 async def generate_response(user_query: str, tools_description: str):
     """
     Generate AI response to identify appropriate tool for user query.
@@ -75,41 +222,280 @@ async def generate_response(user_query: str, tools_description: str):
             "arguments": {"location": "default"}
         }
     """
-    log_color(f"Routing query to Gemini for tool selection: {user_query}", "b", prefix="[model]")
-    api_key = os.getenv("GEMINI_API_KEY")
-    client = genai.Client(api_key=api_key)
-    
-    tool_identifier_prompt = fetch_tool_identifier_prompt()
-    tool_identifier_prompt = tool_identifier_prompt.format(user_query=user_query, tools_description=tools_description)
+    return identify_tool(user_query, tools_description)
 
-    log_color(f"Gemini prompt: {tool_identifier_prompt}", "d", prefix="[debug]")
-    response = client.models.generate_content(
-        model='gemini-2.0-flash-001', 
-        contents=tool_identifier_prompt
-    )
-    log_color(f"Gemini response: {response}", "d", prefix="[debug]")
-    raw = response.text.strip()
-    raw = raw.replace("```json", "").replace("```","")
-    data = json.loads(raw)
-    log_color(f"Cleaned response: {data}", "d", prefix="[debug]")
-    log_color(f"Gemini identified tool {data.get('tool_identified','?')} with args {data.get('arguments',{})}", "b", prefix="[model]")
 
-    if isinstance(data["arguments"], str):
-        args_list = [arg.strip() for arg in data["arguments"].split(",")]
-        data["arguments"] = {args_list[0]: args_list[1]} if len(args_list) > 1 else {args_list[0]: True}
+class GeminiRouter(DeepseekRouter):
+    """
+    Route prompts to the course tools with Gemini.
 
-    return data
-    
-async def main(user_input: str):
+    Without ``GEMINI_API_KEY`` (or when Gemini fails) the shared keyword
+    heuristics from ``DeepseekRouter`` take over. Unambiguous prompts that name
+    known symbols are answered by the shared regex fast path, and Gemini decisions
+    go through the shared per-prompt cache, so only the remaining prompts reach the model.
     """
-    Main function to handle MCP client session and tool execution.
-    
-    This function establishes a connection to the MCP server, initializes a session,
-    lists available tools, identifies the appropriate tool using AI, and executes
-    the identified tool with the provided arguments.
+
+    def __init__(self, api_key: Optional[str], model: str = GEMINI_MODEL, debug: bool = True) -> None:
+        super().__init__(api_key=api_key, model=model, debug=debug)
+        # One SDK client for the router's lifetime keeps its HTTP session warm.
+        self._client = genai.Client(api_key=api_key) if api_key else None
+        self.tools_description = DEFAULT_TOOLS_DESCRIPTION
+
+    @property
+    def tools_description(self) -> str:
+        return self._tools_description
+
+    @tools_description.setter
+    def tools_description(self, value: str) -> None:
+        # Render everything around the user query once; each route only concatenates.
+        self._tools_description = value
+        head, tail = fetch_tool_identifier_prompt().split("{user_query}")
+        self._prompt_prefix = head.format(tools_description=value)
+        self._prompt_suffix = tail.format()
+
+    def _deepseek_route(self, prompt: str) -> ToolCall:
+        # DeepseekRouter.route calls this hook whenever an API key is configured.
+        return self._gemini_route(prompt)
+
+    def _gemini_route(self, prompt: str) -> ToolCall:
+        if self._client is None:
+            raise ValueError("Gemini API key is not configured.")
+        contents = self._prompt_prefix + prompt + self._prompt_suffix
+        self._log_debug("[Gemini] Prompt: %s", contents)
+        raw = self._stream_reply(contents)
+        self._log_debug("[Gemini] Raw reply: %s", raw)
+        data = parse_tool_reply(raw)
+        tool_name = data.get("tool_identified")
+        arguments = data.get("arguments")
+        if tool_name not in COURSE_TOOLS or not isinstance(arguments, dict):
+            raise ValueError("Gemini response did not include a valid tool call.")
+        # The course tools take string parameters; the freshly parsed dict is reused when it already complies.
+        if not all(type(value) is str for value in arguments.values()):
+            arguments = {key: value if type(value) is str else str(value) for key, value in arguments.items()}
+        return ToolCall(tool_name, arguments, source="gemini")
+
+    def _stream_reply(self, contents: str) -> str:
+        """Stream the reply and stop reading once the top-level JSON object has closed."""
+        parts = []
+        # Braces inside strings (an echoed user_query, say) must not end the object early.
+        scanner = _BraceScanner()
+        for chunk in self._client.models.generate_content_stream(model=self.model, contents=contents):
+            text = chunk.text or ""
+            parts.append(text)
+            if scanner.feed(text) >= 0:
+                break
+        return "".join(parts)
+
+
+class CourseMCPClient:
+    """
+    Keep a single MCP session to the course server open across many tool calls.
+
+    The original tutorial spawned ``server.py`` and repeated the MCP ``initialize``
+    handshake for every query. This client owns one session instead; ``start`` and
+    ``shutdown`` are reference counted so nested users share the same process.
+    """
+
+    def __init__(
+        self,
+        server_path: Path = SERVER_PATH,
+        debug: bool = True,
+        *,
+        force_memory: Optional[bool] = None,
+    ) -> None:
+        self.server_path = Path(server_path)
+        self.debug = debug
+        force_memory_env = os.getenv("MCP_FORCE_MEMORY", "").lower() in {"1", "true", "yes"}
+        self.force_memory = force_memory if force_memory is not None else force_memory_env
+        self._session: Optional[ClientSession] = None
+        self._memory_session_cm = None
+        self._read = None
+        self._write = None
+        self._stdio_cm = None
+        self._refcount = 0
+
+    async def __aenter__(self) -> "CourseMCPClient":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback) -> None:
+        await self.shutdown()
+
+    async def start(self) -> None:
+        """Open the MCP session, or reuse it when another holder already did."""
+        self._refcount += 1
+        if self._session is not None:
+            return
+        try:
+            if self.force_memory:
+                await self._start_memory_session()
+            else:
+                await self._start_stdio_session()
+        except BaseException:
+            self._refcount -= 1
+            await self._teardown()
+            raise
+
+    async def connect(self) -> "CourseMCPClient":
+        """Acquire the session for external reuse; pair with ``disconnect``."""
+        await self.start()
+        return self
+
+    async def disconnect(self) -> None:
+        """Release a session previously acquired with ``connect``."""
+        await self.shutdown()
+
+    async def _start_stdio_session(self) -> None:
+        """Spawn ``server.py`` once and initialise the MCP session over stdio."""
+        server_params = StdioServerParameters(
+            command=sys.executable,
+            args=[str(self.server_path)],
+            cwd=str(self.server_path.parent),
+        )
+        self._stdio_cm = stdio_client(server_params)
+        self._read, self._write = await self._stdio_cm.__aenter__()
+        log_color("Connection established, creating session...", "y", prefix="[mcp-client]")
+        self._session = ClientSession(self._read, self._write)
+        await self._session.__aenter__()
+        log_color("Session created, initializing...", "y", prefix="[mcp-client]")
+        await self._session.initialize()
+        log_color("MCP session initialized", "y", prefix="[mcp-client]")
+
+    async def _start_memory_session(self) -> None:
+        """Connect to the course FastMCP server in-process using memory streams."""
+        from course_version import server as server_module
+
+        self._memory_session_cm = create_connected_server_and_client_session(
+            server_module.mcp._mcp_server,  # pylint: disable=protected-access
+            raise_exceptions=True,
+        )
+        self._session = await self._memory_session_cm.__aenter__()
+        if self.debug:
+            log_color("In-process MCP session initialised.", "d", prefix="[debug]")
+
+    async def shutdown(self) -> None:
+        """Release one reference and close the session once no holders remain."""
+        if self._refcount > 0:
+            self._refcount -= 1
+        if self._refcount > 0:
+            return
+        await self._teardown()
+
+    async def _close_session(self) -> None:
+        if self._session is not None:
+            await self._session.__aexit__(None, None, None)
+        # The two stream ends are independent, so close them together.
+        await asyncio.gather(
+            *(stream.aclose() for stream in (self._write, self._read) if stream is not None),
+            return_exceptions=True,
+        )
+
+    async def _teardown(self) -> None:
+        """Close the MCP session and stop the server process."""
+        if self._memory_session_cm is not None:
+            await self._memory_session_cm.__aexit__(None, None, None)
+            self._memory_session_cm = None
+            self._session = None
+            return
+
+        # The session has to be exited by the task that entered it, so neither wait_for (a new task)
+        # nor an anyio scope (nested inside the session's) can bound it. Cancel this task on a
+        # timer instead, as asyncio.timeout does on Python 3.11+.
+        timed_out = False
+
+        def _expire() -> None:
+            nonlocal timed_out
+            timed_out = True
+            task.cancel()
+
+        task = asyncio.current_task()
+        deadline = asyncio.get_running_loop().call_later(TEARDOWN_TIMEOUT_SECONDS, _expire)
+        try:
+            await self._close_session()
+        except asyncio.CancelledError:
+            if not timed_out:
+                raise
+            if hasattr(task, "uncancel"):
+                # Python 3.11+ counts cancel requests; retire ours so later awaits run normally.
+                task.uncancel()
+            log_color("Session teardown timed out; stopping the server process.", "r", prefix="[error]")
+        finally:
+            deadline.cancel()
+            self._session = None
+            self._write = None
+            self._read = None
+            # Exiting stdio_client terminates the server, so it always runs last.
+            if self._stdio_cm is not None:
+                stdio_cm, self._stdio_cm = self._stdio_cm, None
+                await stdio_cm.__aexit__(None, None, None)
+
+    async def describe_tools(self) -> str:
+        """Render the server's tool list in the format expected by the Gemini prompt."""
+        if self._session is None:
+            raise RuntimeError("MCP session is not initialised.")
+        tools = await self._session.list_tools()
+        if self.debug:
+            log_color(f"Discovered {len(tools.tools)} tools from server.", "d", prefix="[debug]")
+        tools_description = ""
+        for each_tool in tools.tools:
+            current_tool_description = "Tool - " + each_tool.name + ":" + "\n"
+            current_tool_description += each_tool.description + "\n"
+            tools_description += current_tool_description + "\n"
+        return tools_description
+
+    async def invoke(self, tool_call: ToolCall) -> str:
+        """Execute a tool call over the open session and return the text reply."""
+        if self._session is None:
+            raise RuntimeError("MCP session is not initialised.")
+        arguments = {
+            ARGUMENT_ALIASES.get(key, key): value for key, value in tool_call.arguments.items()
+        }
+        response = await self._session.call_tool(tool_call.name, arguments=arguments)
+        # Only the first text chunk is used, so stop scanning once it is found.
+        raw_text = next(
+            (item.text for item in getattr(response, "content", ()) if getattr(item, "type", "") == "text"),
+            None,
+        )
+        return raw_text if raw_text is not None else ""
+
+
+_SHARED_CLIENTS: Dict[Path, CourseMCPClient] = {}
+
+
+def get_shared_client(server_path: Path = SERVER_PATH) -> CourseMCPClient:
+    """
+    Return the process-wide client for ``server_path``.
+
+    Acquire it with ``await client.connect()`` and release it with
+    ``await client.disconnect()``; the server process stays warm in between so
+    repeated queries skip the spawn and MCP handshake.
+    """
+    key = Path(server_path).resolve()
+    client = _SHARED_CLIENTS.get(key)
+    if client is None:
+        client = CourseMCPClient(server_path=key)
+        _SHARED_CLIENTS[key] = client
+    return client
+
+
+async def main(
+    user_input: str,
+    client: Optional[CourseMCPClient] = None,
+    router: Optional[GeminiRouter] = None,
+):
+    """
+    Main function to handle a single query against the MCP server.
+
+    This function reuses an open MCP client session, lists available tools,
+    identifies the appropriate tool using AI, and executes the identified tool
+    with the provided arguments.
     
     Args:
         user_input (str): The user's query to be processed
+        client (CourseMCPClient, optional): Open client to reuse. Defaults to the
+            shared client for ``server.py``, which is connected for this call only.
+        router (GeminiRouter, optional): Router to reuse so its decision cache
+            persists across queries. A fresh router is built when omitted.
         
     Returns:
         None: Prints results to console
@@ -118,55 +504,52 @@ async def main(user_input: str):
         Exception: Various exceptions related to MCP server connection,
                   session initialization, or tool execution
                   
-    Note:
-        The server parameters are hardcoded and should be configured for your
-        specific environment. Update the 'cwd' parameter to match your project path.
-        
     Example:
         >>> await main("What is the weather in New York?")
         # Connects to MCP server, identifies weather tool, executes it
     """
-    log_color("-" * 50, "w", prefix="[prompt]")
-    log_color(f"The User Input is : {user_input}", "w", prefix="[prompt]")
-    server_params = StdioServerParameters(
-            command="python",
-            args=["server.py"],
-            cwd="./" #Configure your current working directory
-        )
+    client = client or get_shared_client()
+    # Buffer the turn's log lines and write them once when the query finishes.
+    with LifecycleBatch(debug=client.debug) as batch:
+        batch.add_line("-" * 50, "w", prefix="[prompt]")
+        batch.add("query", user_input)
+        try:
+            async with client:
+                try:
+                    if router is None:
+                        router = GeminiRouter(api_key=os.getenv("GEMINI_API_KEY"))
+                        router.tools_description = await client.describe_tools()
+                    tool_call = router.route(user_input)
+                    batch.add("analysis", f"Strategy={tool_call.source}; tool={tool_call.name}; args={tool_call.arguments}")
+                    response_text = await client.invoke(tool_call)
+                    batch.add("final", response_text)
+                    batch.add_line("-" * 50, "w", prefix="[prompt]")
+                except Exception as e:
+                    batch.add_line(f"Tool execution error: {str(e)}", "r", prefix="[error]")
+        except Exception as e:
+            batch.add_line(f"Connection error: {str(e)}", "r", prefix="[error]")
+
+
+async def interactive_loop():
+    """
+    Prompt for queries until EOF, reusing one MCP session for the whole run.
+    """
+    client = get_shared_client()
+    router = GeminiRouter(api_key=os.getenv("GEMINI_API_KEY"))
+    # Prompt lines arrive through the loop's selector instead of a worker thread.
+    reader = AsyncLineReader()
     try:
-        async with stdio_client(server_params) as (read, write):
-            log_color("Connection established, creating session...", "y", prefix="[mcp-client]")
-            try:
-                async with ClientSession(read, write) as session:
-                    log_color("Session created, initializing...", "y", prefix="[mcp-client]")
-                    try:
-                        await session.initialize()
-                        log_color("MCP session initialized", "y", prefix="[mcp-client]")
-
-                        tools = await session.list_tools()
-                        log_color(f"Discovered {len(tools.tools)} tools from server.", "d", prefix="[debug]")
-                        tools_description = ""
-                        for each_tool in tools.tools:
-                            current_tool_description = "Tool - " + each_tool.name + ":" + "\n"
-                            current_tool_description += each_tool.description + "\n"
-                            tools_description +=  current_tool_description + "\n"
-
-                        request_json = await generate_response(user_query=user_input, tools_description=tools_description)
-                        log_color(
-                            f"Identified tool: {request_json['tool_identified']} with args {request_json['arguments']}",
-                            "b",
-                            prefix="[model]",
-                        )
-                        response = await session.call_tool(request_json["tool_identified"], arguments=request_json["arguments"])
-                        log_color(f"Tool response: {response.content[0].text}", "g", prefix="[result]")
-                        log_color("-" * 50, "w", prefix="[prompt]")
-                        print("\n\n")
-                    except Exception as e:
-                            log_color(f"Session initialization error: {str(e)}", "r", prefix="[error]")
-            except Exception as e:
-                    log_color(f"Session creation error: {str(e)}", "r", prefix="[error]")
-    except Exception as e:
-            log_color(f"Connection error: {str(e)}", "r", prefix="[error]")
+        async with client:
+            router.tools_description = await client.describe_tools()
+            while True:
+                try:
+                    query = await reader.readline("What is your query? → ")
+                except (EOFError, KeyboardInterrupt):
+                    break
+                await main(query, client, router)
+    finally:
+        reader.close()
+
 
 if __name__ == "__main__":
     """
@@ -174,7 +557,7 @@ if __name__ == "__main__":
     
     Runs an interactive loop that continuously prompts the user for queries
     and processes them using the MCP client system. Each query is processed
-    asynchronously through the main() function.
+    asynchronously through the main() function over one shared MCP session.
     
     Usage:
         Run this script directly to start the interactive query loop.
@@ -187,7 +570,4 @@ if __name__ == "__main__":
         # Processes the query and displays results
         What is your query? → 
     """
-    while True:
-        query = input("What is your query? → ")
-        log_color(f"Running query: {query}", "w", prefix="[prompt]")
-        asyncio.run(main(query))
+    asyncio.run(interactive_loop())
@@ -16,21 +16,28 @@ Fallback Strategy:
 Dependencies:
 - mcp.server.fastmcp: FastMCP framework for creating MCP servers
 - yfinance: Yahoo Finance API wrapper for stock data retrieval
-- pandas: For CSV data handling
+- csv (stdlib): For CSV data handling
 """
 
+import asyncio
+import csv
 from pathlib import Path
 import sys
 
 from mcp.server.fastmcp import FastMCP
 import yfinance as yf
-import pandas as pd
 import os
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
 from typing import Optional
 
-REPO_ROOT = Path(__file__).resolve().parents[1]
-if str(REPO_ROOT) not in sys.path:
-    sys.path.insert(0, str(REPO_ROOT))
+# Only needed when run as a script; skip the realpath when the repo is already importable.
+if "utils" not in sys.modules:
+    REPO_ROOT = str(Path(__file__).resolve().parents[1])
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
 
 from utils.utils import log_color
 
@@ -39,6 +46,76 @@ mcp = FastMCP("Stock Server")
 # CSV file path - modify as needed
 CSV_FILE_PATH = "stocks_data.csv"
 
+# Parsed CSV prices keyed by upper-case symbol, rebuilt only when the file's mtime changes.
+_CSV_CACHE: Optional[dict[str, float]] = None
+_CSV_MTIME: float = 0.0
+_CSV_LOCK = threading.Lock()
+
+
+# Recent yfinance quotes: symbol -> (price, expiry on the monotonic clock, source).
+QUOTE_CACHE_TTL_SECONDS = float(os.getenv("QUOTE_CACHE_TTL_SECONDS", "60"))
+QUOTE_CACHE_MAX_SYMBOLS = 1024
+_QUOTE_CACHE: "OrderedDict[str, tuple[float, float, str]]" = OrderedDict()
+
+
+def get_cached_quote(symbol: str) -> Optional[tuple[float, str]]:
+    """
+    Return a still-fresh cached quote for ``symbol`` as ``(price, source)``.
+    
+    Expired entries are dropped; hits are moved to the most-recently-used end.
+    """
+    entry = _QUOTE_CACHE.get(symbol)
+    if entry is None:
+        return None
+    price, expiry, source = entry
+    if time.monotonic() >= expiry:
+        del _QUOTE_CACHE[symbol]
+        return None
+    _QUOTE_CACHE.move_to_end(symbol)
+    return price, source
+
+
+@lru_cache(maxsize=QUOTE_CACHE_MAX_SYMBOLS)
+def get_ticker(symbol: str) -> "yf.Ticker":
+    """
+    Return a reusable ``yf.Ticker`` for ``symbol``.
+    
+    Ticker objects keep per-symbol state (timezone, metadata) between calls;
+    yfinance itself already shares one HTTP session across all tickers.
+    """
+    return yf.Ticker(symbol)
+
+
+def remember_quote(symbol: str, price: float, source: str) -> None:
+    """
+    Store a live quote for ``QUOTE_CACHE_TTL_SECONDS``, evicting the least recently used symbol when full.
+    """
+    _QUOTE_CACHE[symbol] = (price, time.monotonic() + QUOTE_CACHE_TTL_SECONDS, source)
+    _QUOTE_CACHE.move_to_end(symbol)
+    if len(_QUOTE_CACHE) > QUOTE_CACHE_MAX_SYMBOLS:
+        _QUOTE_CACHE.popitem(last=False)
+
+
+def load_csv_prices() -> dict[str, float]:
+    """
+    Return the CSV prices as a symbol -> price mapping.
+    
+    The file is parsed once and re-read only when its modification time changes,
+    so repeated fallback lookups are dictionary hits instead of a file scan.
+    The lock keeps the rebuild safe when tools run on worker threads.
+    """
+    global _CSV_CACHE, _CSV_MTIME
+    mtime = os.stat(CSV_FILE_PATH).st_mtime
+    with _CSV_LOCK:
+        if _CSV_CACHE is None or mtime != _CSV_MTIME:
+            with open(CSV_FILE_PATH, newline='', encoding='utf-8') as csv_file:
+                _CSV_CACHE = {
+                    row['symbol'].strip().upper(): float(row['price'])
+                    for row in csv.DictReader(csv_file)
+                }
+            _CSV_MTIME = mtime
+        return _CSV_CACHE
+
 def get_price_from_csv(symbol: str) -> Optional[float]:
     """
     Retrieve stock price from local CSV file.
@@ -56,33 +133,30 @@ def get_price_from_csv(symbol: str) -> Optional[float]:
     """
     log_color(f"CSV lookup requested for {symbol}", "p", prefix="[course-server]", use_stderr=True)
     try:
-        if not os.path.exists(CSV_FILE_PATH):
-            log_color(f"CSV file missing at {CSV_FILE_PATH}", "r", prefix="[course-server]", use_stderr=True)
-            return None
-            
-        df = pd.read_csv(CSV_FILE_PATH)
-        
-        # Convert symbol column to uppercase for case-insensitive matching
-        df['symbol'] = df['symbol'].str.upper()
+        # Symbols are upper-cased once per file load, so only the query needs it here
         symbol = symbol.upper()
+        price = load_csv_prices().get(symbol)
         
-        # Find the stock in the CSV
-        stock_row = df[df['symbol'] == symbol]
-        
-        if not stock_row.empty:
+        if price is not None:
             log_color(f"Found {symbol} price in CSV", "p", prefix="[course-server]", use_stderr=True)
-            return float(stock_row['price'].iloc[0])
+            return price
         else:
             return None
             
+    except FileNotFoundError:
+        log_color(f"CSV file missing at {CSV_FILE_PATH}", "r", prefix="[course-server]", use_stderr=True)
+        return None
     except Exception as e:
         log_color(f"Error reading CSV file: {e}", "r", prefix="[course-server]", use_stderr=True)
         return None
 
-def get_stock_price_with_fallback(symbol: str) -> tuple[Optional[float], str]:
+async def get_stock_price_with_fallback(symbol: str) -> tuple[Optional[float], str]:
     """
     Get stock price with fallback mechanism.
     
+    yfinance and the CSV reader are blocking, so they run in worker threads;
+    this lets callers such as compare_stocks await several symbols at once.
+    
     Parameters:
         symbol: Stock ticker symbol
         
@@ -90,24 +164,33 @@ def get_stock_price_with_fallback(symbol: str) -> tuple[Optional[float], str]:
         Tuple of (price, source) where source is 'yfinance' or 'csv'
     """
     log_color(f"Fetching price for {symbol} with yfinance fallback", "p", prefix="[course-server]", use_stderr=True)
+    # Serve repeated lookups from the short-lived quote cache
+    cache_key = symbol.upper()
+    cached = get_cached_quote(cache_key)
+    if cached is not None:
+        log_color(f"Quote cache hit for {symbol}", "p", prefix="[course-server]", use_stderr=True)
+        return cached
+
     # Try yfinance first
     try:
-        ticker = yf.Ticker(symbol)
+        ticker = get_ticker(cache_key)
         
         # Get today's data (may be empty if market is closed)
-        data = ticker.history(period="1d")
+        data = await asyncio.to_thread(ticker.history, period="1d")
         
         if not data.empty:
             price = data['Close'].iloc[-1]
             log_color(f"yfinance returned closing price for {symbol}", "p", prefix="[course-server]", use_stderr=True)
+            remember_quote(cache_key, price, 'yfinance')
             return price, 'yfinance'
         else:
             # Try using regular market price from ticker info
-            info = ticker.info
+            info = await asyncio.to_thread(getattr, ticker, "info")
             price = info.get("regularMarketPrice")
             
             if price is not None:
                 log_color(f"yfinance regularMarketPrice used for {symbol}", "p", prefix="[course-server]", use_stderr=True)
+                remember_quote(cache_key, price, 'yfinance')
                 return price, 'yfinance'
     
     except Exception as e:
@@ -115,7 +198,7 @@ def get_stock_price_with_fallback(symbol: str) -> tuple[Optional[float], str]:
         pass
     
     # Fallback to CSV
-    csv_price = get_price_from_csv(symbol)
+    csv_price = await asyncio.to_thread(get_price_from_csv, symbol)
     if csv_price is not None:
         log_color(f"Using CSV fallback for {symbol}", "p", prefix="[course-server]", use_stderr=True)
         return csv_price, 'csv'
@@ -124,7 +207,7 @@ def get_stock_price_with_fallback(symbol: str) -> tuple[Optional[float], str]:
     return None, 'none'
 
 @mcp.tool()
-def get_stock_price(symbol: str) -> str:
+async def get_stock_price(symbol: str) -> str:
     """
     Retrieve the current stock price for the given ticker symbol.
     First tries Yahoo Finance API, then falls back to local CSV file.
@@ -136,7 +219,7 @@ def get_stock_price(symbol: str) -> str:
         Current stock price information
     """
     log_color(f"Tool invoked: get_stock_price({symbol})", "p", prefix="[course-server]", use_stderr=True)
-    price, source = get_stock_price_with_fallback(symbol)
+    price, source = await get_stock_price_with_fallback(symbol)
     
     if price is not None:
         source_text = " (from Yahoo Finance)" if source == 'yfinance' else " (from local data)"
@@ -149,7 +232,7 @@ def get_stock_price(symbol: str) -> str:
                f"exists with the required format."
 
 @mcp.tool()
-def compare_stocks(symbol1: str, symbol2: str) -> str:
+async def compare_stocks(symbol1: str, symbol2: str) -> str:
     """
     Compare the current stock prices of two ticker symbols.
     First tries Yahoo Finance API, then falls back to local CSV file for each symbol.
@@ -162,9 +245,16 @@ def compare_stocks(symbol1: str, symbol2: str) -> str:
         Comparison of the two stock prices
     """
     log_color(f"Tool invoked: compare_stocks({symbol1}, {symbol2})", "p", prefix="[course-server]", use_stderr=True)
-    # Get prices for both symbols
-    price1, source1 = get_stock_price_with_fallback(symbol1)
-    price2, source2 = get_stock_price_with_fallback(symbol2)
+    if symbol1.strip().upper() == symbol2.strip().upper():
+        # Same ticker twice (usually a routing slip): fetch it once
+        price1, source1 = await get_stock_price_with_fallback(symbol1)
+        price2, source2 = price1, source1
+    else:
+        # Get prices for both symbols concurrently
+        (price1, source1), (price2, source2) = await asyncio.gather(
+            get_stock_price_with_fallback(symbol1),
+            get_stock_price_with_fallback(symbol2),
+        )
     
     if price1 is None:
         log_color(f"Missing data for {symbol1}", "r", prefix="[course-server]", use_stderr=True)
@@ -21,13 +21,19 @@ from utils.utils import log_color
 
 Variant = Literal["raw", "mcp", "course"]
 
+# The course variant is executed as a script (see ``main``), so it is not listed here.
+_VARIANT_MODULES = {
+  "raw": "raw_version.client",
+  "mcp": "mcp_version.client",
+}
+
 
 def _load_variant(variant: Variant):
-  if variant == "raw":
-    return importlib.import_module("raw_version.client")
-  if variant == "mcp":
-    return importlib.import_module("mcp_version.client")
-  raise ValueError(f"Unknown variant {variant}")
+  try:
+    name = _VARIANT_MODULES[variant]
+  except KeyError:
+    raise ValueError(f"Unknown variant {variant}") from None
+  return sys.modules.get(name) or importlib.import_module(name)
 
 
 def main() -> None:
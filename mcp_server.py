@@ -17,14 +17,19 @@ from typing import Literal
 Variant = Literal["raw", "mcp", "course"]
 
 
+_VARIANT_MODULES = {
+  "raw": "raw_version.server",
+  "mcp": "mcp_version.server",
+  "course": "course_version.server",
+}
+
+
 def _load_variant(variant: Variant):
-  if variant == "raw":
-    return importlib.import_module("raw_version.server")
-  if variant == "mcp":
-    return importlib.import_module("mcp_version.server")
-  if variant == "course":
-    return importlib.import_module("course_version.server")
-  raise ValueError(f"Unknown variant {variant}")
+  try:
+    name = _VARIANT_MODULES[variant]
+  except KeyError:
+    raise ValueError(f"Unknown variant {variant}") from None
+  return sys.modules.get(name) or importlib.import_module(name)
 
 
 def main() -> None:
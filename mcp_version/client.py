@@ -2,34 +2,80 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import atexit
 import json
 import os
 import sys
+import weakref
+from contextlib import asynccontextmanager
 from datetime import timedelta
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, AsyncContextManager, Callable, Dict, List, Optional, Sequence, Tuple
 
 import httpx
 from dotenv import load_dotenv
 
-from openai import OpenAI
-
+from utils import fastjson
+from utils.async_input import AsyncLineReader
+from utils.eventloop import install_uvloop
 from utils.deepseek import DEFAULT_MODEL, DeepseekRouter as BaseRouter
-from utils.utils import ToolCall, log_color, log_lifecycle_event, render_result
+from utils.utils import AsyncLifecycleLogger, LazyDetail, TOOL_NAMES, ToolCall, log_color, log_lifecycle_event, render_result
 
 try:  # pragma: no cover - optional dependency for this variant
   from mcp import ClientSession, StdioServerParameters
   from mcp.client.stdio import stdio_client
   from mcp.shared.memory import create_connected_server_and_client_session
+  from mcp.types import CallToolResult, TextContent
 except ImportError as exc:  # pragma: no cover - deferred dependency
   raise ImportError("Install the 'mcp' package to use the MCP client variant.") from exc
 
+try:
+  import h2  # noqa: F401  # enables HTTP/2 in httpx
+except ModuleNotFoundError:  # pragma: no cover - optional dependency
+  h2 = None  # type: ignore[assignment]
+
+ROUTER_SYSTEM_PROMPT = (
+  "You are a routing assistant for a stock data toolset. "
+  "Map the user's prompt to either 'get_stock_price' or "
+  "'compare_stocks'. Always return JSON with keys "
+  "tool (string) and arguments (object). For get_stock_price "
+  "provide symbol. For compare_stocks provide symbol_one and "
+  "symbol_two. Symbols must be uppercase tickers."
+)
+ROUTER_SYSTEM_MESSAGE: Dict[str, str] = {"role": "system", "content": ROUTER_SYSTEM_PROMPT}
+
+
+# Keep a few warm connections to the routing API between prompts.
+HTTP_CLIENT_OPTIONS: Dict[str, Any] = {
+  "http2": h2 is not None,
+  "follow_redirects": True,
+  "timeout": httpx.Timeout(600.0, connect=5.0),
+  "limits": httpx.Limits(max_keepalive_connections=4, keepalive_expiry=120.0),
+}
+
+
+def log_debug(message: str) -> None:
+  """Emit a debug line on stderr so stdout carries only the REPL conversation."""
+  log_color(message, "d", prefix="[debug]", use_stderr=True)
+
 
 class OpenAIBackedRouter(BaseRouter):
   """
-  Router that uses the official OpenAI Python SDK for structured routing with Deepseek.
+  Router that calls Deepseek's OpenAI-compatible chat completions endpoint over httpx.
+
+  ``route_async`` uses a pooled ``httpx.AsyncClient`` so the event loop keeps
+  serving the MCP session during the round-trip; ``route`` uses a blocking
+  client for synchronous callers. Both pools are shared by every router instance
+  (the async one per event loop), so new routers reuse warm connections.
+  Successful decisions go through the base router's per-prompt cache.
   """
 
+  _shared_http_client: Optional[httpx.Client] = None
+  _shared_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+  )
+
   def __init__(
     self,
     api_key: Optional[str],
@@ -39,62 +85,284 @@ class OpenAIBackedRouter(BaseRouter):
   ) -> None:
     super().__init__(api_key=api_key, model=model, debug=debug)
     self.base_url = base_url
+    self._completions_url = base_url.rstrip("/") + "/chat/completions"
+    self._headers = {"Content-Type": "application/json"}
     if api_key:
-      # Explicit http_client sidesteps httpx>=0.28 dropping the `proxies` kwarg the OpenAI SDK still uses.
-      http_client = httpx.Client(follow_redirects=True, timeout=httpx.Timeout(600.0, connect=5.0))
-      self._client = OpenAI(api_key=api_key, base_url=base_url, http_client=http_client)
-    else:
-      self._client = None
+      self._headers["Authorization"] = f"Bearer {api_key}"
+    # Everything but the user prompt is fixed, so encode it once and splice the prompt in.
+    static_body = fastjson.dumps({
+      "model": model,
+      "response_format": {"type": "json_object"},
+      "messages": [ROUTER_SYSTEM_MESSAGE],
+    })
+    self._body_prefix = static_body[:-2] + b',{"role":"user","content":'
+    self._body_suffix = b"}]}"
+
+  @classmethod
+  def _http_client(cls) -> httpx.Client:
+    if cls._shared_http_client is None:
+      cls._shared_http_client = httpx.Client(**HTTP_CLIENT_OPTIONS)
+      atexit.register(cls._shared_http_client.close)
+    return cls._shared_http_client
+
+  @classmethod
+  def _async_http_client(cls) -> httpx.AsyncClient:
+    # Async connections belong to the loop that opened them.
+    loop = asyncio.get_running_loop()
+    client = cls._shared_async_clients.get(loop)
+    if client is None:
+      client = httpx.AsyncClient(**HTTP_CLIENT_OPTIONS)
+      cls._shared_async_clients[loop] = client
+    return client
+
+  async def aclose(self) -> None:
+    """Close the async connection pool of the running loop; the sync pool closes at exit."""
+    client = self._shared_async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+      await client.aclose()
+
+  def _log_debug(self, message: str, *args: object) -> None:
+    if self.debug:
+      log_debug(message % args if args else message)
+
+  def _request_body(self, prompt: str) -> bytes:
+    self._log_debug("[Deepseek/OpenAI] Request user message: %s", prompt)
+    return self._body_prefix + fastjson.dumps(prompt) + self._body_suffix
 
   def _deepseek_route(self, prompt: str) -> ToolCall:
-    if not self._client:
+    if not self.api_key:
       raise ValueError("Deepseek API key is not configured.")
+    response = self._http_client().post(
+      self._completions_url, headers=self._headers, content=self._request_body(prompt), timeout=20
+    )
+    response.raise_for_status()
+    return self._parse_completion(fastjson.loads(response.content))
 
-    payload_messages = [
-      {
-        "role": "system",
-        "content": (
-          "You are a routing assistant for a stock data toolset. "
-          "Map the user's prompt to either 'get_stock_price' or "
-          "'compare_stocks'. Always return JSON with keys "
-          "tool (string) and arguments (object). For get_stock_price "
-          "provide symbol. For compare_stocks provide symbol_one and "
-          "symbol_two. Symbols must be uppercase tickers."
-        ),
-      },
-      {"role": "user", "content": prompt},
-    ]
-    self._log_debug(f"[Deepseek/OpenAI] Request messages: {payload_messages}")
-    response = self._client.chat.completions.create(
-      model=self.model,
-      messages=payload_messages,
-      response_format={"type": "json_object"},
-      timeout=20,
+  async def _deepseek_route_async(self, prompt: str) -> ToolCall:
+    if not self.api_key:
+      raise ValueError("Deepseek API key is not configured.")
+    response = await self._async_http_client().post(
+      self._completions_url, headers=self._headers, content=self._request_body(prompt), timeout=20
     )
-    choice_message = response.choices[0].message
-    content = choice_message.content or ""
+    response.raise_for_status()
+    return self._parse_completion(fastjson.loads(response.content))
+
+  def _parse_completion(self, data: Dict[str, Any]) -> ToolCall:
+    choices = data.get("choices") or []
+    if not choices:
+      raise ValueError("Deepseek did not return any choices.")
+    content = (choices[0].get("message") or {}).get("content") or ""
     if isinstance(content, list):
-      content = "".join(str(chunk) for chunk in content)
-    self._log_debug(f"[Deepseek/OpenAI] Raw content: {content}")
+      content = "".join(
+        chunk.get("text", "") if isinstance(chunk, dict) else str(chunk)
+        for chunk in content
+      )
+    self._log_debug("[Deepseek/OpenAI] Raw content: %s", content)
 
     try:
-      parsed = json.loads(content)
+      parsed = fastjson.loads(content)
     except json.JSONDecodeError as exc:
       raise ValueError("Deepseek response was not valid JSON.") from exc
 
     tool_name = parsed.get("tool")
     arguments = parsed.get("arguments")
-    if tool_name not in {"get_stock_price", "compare_stocks"} or not isinstance(arguments, dict):
+    if tool_name not in TOOL_NAMES or not isinstance(arguments, dict):
       raise ValueError("Deepseek response did not include a valid tool call.")
 
-    tool_call = ToolCall(tool_name, {key: str(value) for key, value in arguments.items()}, source="openai")
-    self._log_debug(f"[Deepseek/OpenAI] Routed to: {tool_call.name} with args {tool_call.arguments}")
+    tool_call = ToolCall(tool_name, arguments, source="openai")
+    self._log_debug("[Deepseek/OpenAI] Routed to: %s with args %s", tool_call.name, tool_call.arguments)
     return tool_call
 
 
+EXIT_COMMANDS = frozenset({"exit", "quit"})
+
+# How long an unused stdio server stays alive so a quick reconnect skips the spawn.
+STDIO_KEEPALIVE_SECONDS = float(os.getenv("MCP_STDIO_KEEPALIVE_SECONDS", "30"))
+SERVER_PATH = Path(__file__).with_name("server.py")
+TRUTHY_ENV_VALUES = frozenset({"1", "true", "yes"})
+
+# Upper bound on waiting for a session context to exit before its owner task is cancelled.
+SHUTDOWN_TIMEOUT_SECONDS = 2.0
+
+
+@lru_cache(maxsize=1)
+def _load_env() -> None:
+  """Read ``.env`` once per process; later callers reuse the populated environment."""
+  load_dotenv()
+
+
+@lru_cache(maxsize=1)
+def _force_memory_default() -> bool:
+  """Parse the memory-transport switches once, on first client construction."""
+  _load_env()
+  # Single-shot runs would spend more on spawning the server than on the query itself.
+  return any(
+    os.getenv(name, "").lower() in TRUTHY_ENV_VALUES
+    for name in ("MCP_FORCE_MEMORY", "MCP_SINGLE_SHOT")
+  )
+
+
+@lru_cache(maxsize=1)
+def _memory_server() -> Any:
+  """Import the FastMCP server once and return the low-level handle memory sessions attach to."""
+  from mcp_version import server as server_module
+
+  return server_module.get_server()._mcp_server  # pylint: disable=protected-access
+
+
+class _OwnedSession:
+  """
+  Hold an MCP session context open on a dedicated task.
+
+  The anyio cancel scopes inside ``stdio_client`` and the memory transport must be
+  exited by the task that entered them; running the context on its own task lets
+  any caller open the session and any other caller close it.
+  """
+
+  def __init__(self, factory: Callable[[], AsyncContextManager[ClientSession]]) -> None:
+    self._factory = factory
+    self._ready = asyncio.Event()
+    self._stop = asyncio.Event()
+    self._task: Optional[asyncio.Task] = None
+    self._error: Optional[BaseException] = None
+    self.session: Optional[ClientSession] = None
+
+  @property
+  def alive(self) -> bool:
+    return self._task is not None and not self._task.done()
+
+  async def open(self) -> ClientSession:
+    """Enter the context on the owner task and return the live session."""
+    self._task = asyncio.create_task(self._run())
+    await self._ready.wait()
+    if self.session is None:
+      raise self._error or RuntimeError("MCP session closed before initialising.")
+    return self.session
+
+  def request_close(self) -> None:
+    """Ask the owner task to exit the context; safe to call from callbacks."""
+    self._stop.set()
+
+  async def close(self, timeout: Optional[float] = SHUTDOWN_TIMEOUT_SECONDS) -> None:
+    """Exit the context, cancelling the owner task if it takes longer than ``timeout``."""
+    self._stop.set()
+    if self._task is None:
+      return
+    try:
+      await asyncio.wait_for(self._task, timeout)
+    except asyncio.TimeoutError:
+      # Before Python 3.11 this is not the builtin TimeoutError.
+      # A wedged server process must not hang the REPL on exit.
+      log_debug("MCP session did not close in time; cancelled it.")
+
+  async def _run(self) -> None:
+    try:
+      async with self._factory() as session:
+        self.session = session
+        self._ready.set()
+        await self._stop.wait()
+    except Exception as exc:  # pylint: disable=broad-except
+      self._error = exc
+    finally:
+      self.session = None
+      self._ready.set()
+
+
+@asynccontextmanager
+async def _stdio_session(params: StdioServerParameters, read_timeout: timedelta):
+  async with stdio_client(params) as (read, write):
+    async with ClientSession(read, write, read_timeout_seconds=read_timeout) as session:
+      await session.initialize()
+      yield session
+
+
+class _PooledStdioServer:
+  """One pooled stdio server: its owned session, lease count and pending close."""
+
+  def __init__(self, owner: _OwnedSession) -> None:
+    self.owner = owner
+    self.refcount = 0
+    self.close_handle: Optional[asyncio.TimerHandle] = None
+
+
+class _StdioServerPool:
+  """
+  Share long-lived stdio servers across clients, keyed by interpreter and script.
+
+  Each server lives on its own :class:`_OwnedSession` task, whichever client
+  releases last. Released servers linger for ``STDIO_KEEPALIVE_SECONDS``; when the
+  event loop shuts down the owner tasks are cancelled and the processes terminated.
+  """
+
+  def __init__(self) -> None:
+    self._loop: Optional[asyncio.AbstractEventLoop] = None
+    self._lock: Optional[asyncio.Lock] = None
+    self._servers: Dict[Tuple[str, ...], _PooledStdioServer] = {}
+
+  @staticmethod
+  def _key(params: StdioServerParameters) -> Tuple[str, ...]:
+    return (params.command, *params.args)
+
+  async def acquire(self, params: StdioServerParameters, read_timeout: timedelta) -> _PooledStdioServer:
+    """Lease a live server for ``params``, spawning it on first use; pass the lease to :meth:`release`."""
+    loop = asyncio.get_running_loop()
+    if loop is not self._loop:
+      # Servers from a previous event loop died with it.
+      self._loop = loop
+      self._lock = asyncio.Lock()
+      self._servers = {}
+
+    key = self._key(params)
+    async with self._lock:
+      server = self._servers.get(key)
+      if server is None or not server.owner.alive:
+        owner = _OwnedSession(lambda: _stdio_session(params, read_timeout))
+        await owner.open()
+        server = _PooledStdioServer(owner)
+        self._servers[key] = server
+      if server.close_handle is not None:
+        server.close_handle.cancel()
+        server.close_handle = None
+      server.refcount += 1
+      return server
+
+  def release(self, server: _PooledStdioServer) -> None:
+    """Drop one lease; the server is stopped after the keep-alive window if unused."""
+    # The lease names its own server: a dead one may since have been replaced under the same key.
+    server.refcount -= 1
+    if server.refcount > 0:
+      return
+    if STDIO_KEEPALIVE_SECONDS <= 0:
+      server.owner.request_close()
+    else:
+      server.close_handle = asyncio.get_running_loop().call_later(
+        STDIO_KEEPALIVE_SECONDS, server.owner.request_close
+      )
+
+  async def close_idle(self) -> None:
+    """Stop every server without leases now instead of after the keep-alive window."""
+    if self._loop is not asyncio.get_running_loop():
+      return
+    idle = [key for key, server in self._servers.items() if server.refcount <= 0]
+    owners = []
+    for key in idle:
+      server = self._servers.pop(key)
+      if server.close_handle is not None:
+        server.close_handle.cancel()
+      owners.append(server.owner)
+    # Each server shuts down independently, so terminate them side by side.
+    await asyncio.gather(*(owner.close() for owner in owners), return_exceptions=True)
+
+
+_STDIO_POOL = _StdioServerPool()
+
+
 class MCPStockClient:
   """Manage an MCP stdio session against the stock tool server using the official MCP package."""
 
+  # Cap on concurrent ``call_tool`` requests issued by :meth:`invoke_many`.
+  MAX_INFLIGHT = 8
+
   def __init__(
     self,
     server_path: Path,
@@ -105,14 +373,16 @@ class MCPStockClient:
   ) -> None:
     self.server_path = server_path
     self.debug = debug
-    force_memory_env = os.getenv("MCP_FORCE_MEMORY", "").lower() in {"1", "true", "yes"}
-    self.force_memory = force_memory if force_memory is not None else force_memory_env
+    self.force_memory = force_memory if force_memory is not None else _force_memory_default()
     self.init_timeout = init_timeout
     self._session: Optional[ClientSession] = None
-    self._memory_session_cm = None
-    self._read = None
-    self._write = None
-    self._stdio_cm = None
+    self._memory_owner: Optional[_OwnedSession] = None
+    # When set, lifecycle events are handed to this background writer instead of printed inline.
+    self.lifecycle: Optional[AsyncLifecycleLogger] = None
+    # The pooled stdio server this client holds a lease on.
+    self._stdio_lease: Optional[_PooledStdioServer] = None
+    # Number of holders sharing the live session; teardown waits for the last one.
+    self._refcount = 0
 
   async def __aenter__(self) -> "MCPStockClient":
     await self.start()
@@ -122,13 +392,36 @@ class MCPStockClient:
     await self.shutdown()
 
   async def start(self) -> None:
-    """Launch the MCP server subprocess and handshake a session."""
+    """
+    Launch the MCP server subprocess and handshake a session.
+
+    Calls are reference counted: re-entering while a session is live reuses it, and
+    every ``start`` must be paired with a :meth:`shutdown`.
+    """
+    self._refcount += 1
     if self._session is not None:
       return
 
+    try:
+      await self._open_session()
+    except BaseException:
+      self._refcount -= 1
+      raise
+
+  async def connect(self) -> "MCPStockClient":
+    """Acquire the session for external reuse; pair with :meth:`disconnect`."""
+    await self.start()
+    return self
+
+  async def disconnect(self) -> None:
+    """Release a session previously acquired with :meth:`connect`."""
+    await self.shutdown()
+
+  async def _open_session(self) -> None:
+    """Pick a transport and initialise the MCP session."""
     if self.force_memory:
       if self.debug:
-        log_color("Using in-process memory transport for MCP client.", "d", prefix="[debug]")
+        log_debug("Using in-process memory transport for MCP client.")
       await self._start_memory_session()
       return
 
@@ -140,179 +433,219 @@ class MCPStockClient:
           f"Stdio transport failed ({exc}); falling back to in-process transport.",
           "y",
           prefix="[debug]",
+          use_stderr=True,
         )
-      await self.shutdown()
+      await self._teardown()
       await self._start_memory_session()
 
   async def _start_stdio_session(self) -> None:
-    """Spin up the FastMCP server as a subprocess and initialise the MCP session."""
+    """Lease a pooled FastMCP server subprocess, spawning and initialising it if needed."""
     params = StdioServerParameters(command=sys.executable, args=["-u", str(self.server_path)])
+    self._stdio_lease = await _STDIO_POOL.acquire(params, timedelta(seconds=self.init_timeout))
+    self._session = self._stdio_lease.owner.session
     if self.debug:
-      log_color(f"[MCP Client] Starting server: {params}", "d", prefix="[debug]")
-      log_color("Running stdio_client...","d", prefix="[debug]")
-    self._stdio_cm = stdio_client(params)
-    if self.debug:
-      log_color("stdio_client running.","d", prefix="[debug]")
-      log_color("Entering stdio_client context manager...","d", prefix="[debug]")
-    self._read, self._write = await self._stdio_cm.__aenter__()
-    if self.debug:
-      log_color("Stdio client context manager entered.","d", prefix="[debug]")
-      log_color("Creating MCP client session...","d", prefix="[debug]")
-    self._session = ClientSession(
-      self._read,
-      self._write,
-      read_timeout_seconds=timedelta(seconds=self.init_timeout),
-    )
-    if self.debug:
-      log_color("MCP client session created.","d", prefix="[debug]")
-      log_color("Entering MCP client session context...","d", prefix="[debug]")
-    await self._session.__aenter__()
-    if self.debug:
-      log_color("MCP client session context entered.","d", prefix="[debug]")
-      log_color("Initializing MCP session...","d", prefix="[debug]")
-    await self._session.initialize()
-    if self.debug:
-      log_color("[MCP Client] MCP session initialised.", "d", prefix="[debug]")
+      log_debug(f"[MCP Client] MCP session initialised on pooled server: {params}")
 
   async def _start_memory_session(self) -> None:
     """Connect to the FastMCP server in-process using memory streams."""
-    from mcp_version import server as server_module
-
-    self._memory_session_cm = create_connected_server_and_client_session(
-      server_module.server._mcp_server,  # pylint: disable=protected-access
-      raise_exceptions=True,
+    server = _memory_server()
+    self._memory_owner = _OwnedSession(
+      lambda: create_connected_server_and_client_session(
+        server,
+        raise_exceptions=True,
+      )
     )
-    self._session = await self._memory_session_cm.__aenter__()
+    self._session = await self._memory_owner.open()
     if self.debug:
-      log_color("In-process MCP session initialised.", "d", prefix="[debug]")
+      log_debug("In-process MCP session initialised.")
 
   async def shutdown(self) -> None:
-    """Terminate the MCP session and the underlying subprocess."""
-    if self._memory_session_cm is not None:
-      await self._memory_session_cm.__aexit__(None, None, None)
-      self._memory_session_cm = None
-      self._session = None
+    """Release one reference and give the session back once no holders remain."""
+    if self._refcount > 0:
+      self._refcount -= 1
+    if self._refcount > 0:
       return
+    await self._teardown()
 
-    if self._session is not None:
-      await self._session.__aexit__(None, None, None)
+  async def _teardown(self) -> None:
+    """Close the in-process session or release the pooled stdio server."""
+    if self._memory_owner is not None:
+      await self._memory_owner.close()
+      self._memory_owner = None
       self._session = None
+      return
 
-    if self._write is not None:
-      await self._write.aclose()
-      self._write = None
-    if self._read is not None:
-      await self._read.aclose()
-      self._read = None
-    if self._stdio_cm is not None:
-      await self._stdio_cm.__aexit__(None, None, None)
-      self._stdio_cm = None
+    # The pooled server outlives this client; just hand the lease back.
+    self._session = None
+    if self._stdio_lease is not None:
+      _STDIO_POOL.release(self._stdio_lease)
+      self._stdio_lease = None
 
   async def invoke(self, tool_call: ToolCall) -> Dict[str, Any]:
     """Execute a tool call over the MCP session."""
     if self._session is None:
       raise RuntimeError("MCP session is not initialised.")
 
-    log_lifecycle_event(
+    self._log_event(
       "mcp",
-      f"Dispatching request to {tool_call.name} with arguments {tool_call.arguments}",
+      lambda: f"Dispatching request to {tool_call.name} with arguments {tool_call.arguments}",
     )
 
     response = await self._session.call_tool(tool_call.name, tool_call.arguments)
 
     payload: Dict[str, Any] = {}
-    if hasattr(response, "content"):
-      text_chunks = [
-        getattr(item, "text", "")
-        for item in getattr(response, "content", [])
-        if getattr(item, "type", "") == "text"
-      ]
-      if text_chunks:
-        raw_text = text_chunks[0]
+    if isinstance(response, CallToolResult):
+      # The server answers with one JSON text block; take the first one.
+      raw_text = next((item.text for item in response.content if type(item) is TextContent), None)
+      if raw_text is not None:
         try:
-          payload = json.loads(raw_text)
+          payload = fastjson.loads(raw_text)
         except json.JSONDecodeError:
           payload = {"data": raw_text}
-    elif hasattr(response, "to_dict"):
-      payload = response.to_dict()  # type: ignore[assignment]
     elif isinstance(response, dict):
       payload = response
+    elif callable(getattr(response, "to_dict", None)):
+      payload = response.to_dict()  # type: ignore[assignment]
     else:
       payload = {"data": response}
 
-    log_lifecycle_event(
-      "mcp",
-      f"Received response payload keys: {list(payload.keys())}",
-    )
+    if payload:
+      self._log_event("mcp", lambda: f"Received response payload keys: {list(payload)}")
     return payload
 
+  async def invoke_many(self, tool_calls: Sequence[ToolCall]) -> List[Dict[str, Any]]:
+    """Execute several tool calls concurrently on the one session, preserving input order."""
+    # JSON-RPC requests carry their own ids, so they can interleave on a single channel.
+    semaphore = asyncio.Semaphore(self.MAX_INFLIGHT)
+
+    async def _invoke_limited(tool_call: ToolCall) -> Dict[str, Any]:
+      async with semaphore:
+        return await self.invoke(tool_call)
+
+    tasks = [asyncio.ensure_future(_invoke_limited(tool_call)) for tool_call in tool_calls]
+    try:
+      return list(await asyncio.gather(*tasks))
+    except BaseException:
+      # One failure cancels the calls still queued or running, then propagates.
+      for task in tasks:
+        task.cancel()
+      raise
+
+  def _log_event(self, stage: str, detail: LazyDetail) -> None:
+    if self.lifecycle is not None:
+      self.lifecycle.emit(stage, detail)
+    else:
+      log_lifecycle_event(stage, detail() if callable(detail) else detail)
+
+
+_SHARED_CLIENTS: Dict[Path, MCPStockClient] = {}
+
+
+def get_shared_client(server_path: Path, debug: bool = True) -> MCPStockClient:
+  """
+  Return the process-wide client for ``server_path``.
+
+  Callers that issue many ``invoke`` calls (tests, batching wrappers) should
+  ``await client.connect()`` once and ``await client.disconnect()`` when done so
+  the server process and MCP ``initialize`` handshake are reused across calls.
+  """
+  key = Path(server_path).resolve()
+  client = _SHARED_CLIENTS.get(key)
+  if client is None:
+    client = MCPStockClient(server_path=key, debug=debug)
+    _SHARED_CLIENTS[key] = client
+  return client
+
+
+def describe_payload(tool_call: ToolCall, response: Dict[str, Any]) -> str:
+  """Summarise a tool payload for the "prepare" lifecycle line."""
+  data = (response.get("data") if isinstance(response, dict) else None) or {}
+  if tool_call.name == "get_stock_price":
+    return f"Symbol={data.get('symbol', 'UNKNOWN')}; source={data.get('source', 'unknown')}"
+  if tool_call.name == "compare_stocks":
+    symbol_one = data.get("symbol_one", {})
+    symbol_two = data.get("symbol_two", {})
+    return f"Comparison payload ready: {symbol_one.get('symbol', '?')} vs {symbol_two.get('symbol', '?')}"
+  return "Received response from tool execution."
+
 
 async def interactive_loop(debug: bool = True) -> None:
   """Run the async REPL that communicates with the MCP server."""
-  load_dotenv()
+  _load_env()
   api_key = os.getenv("DEEPSEEK_KEY")
   base_url = os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com")
   router = OpenAIBackedRouter(api_key=api_key, base_url=base_url, debug=debug)
-  server_path = Path(__file__).with_name("server.py")
 
   if api_key:
-    log_color("Deepseek routing is enabled via OpenAI SDK.", "y", prefix="[mcp-client]")
+    log_color("Deepseek routing is enabled via the OpenAI-compatible API.", "y", prefix="[mcp-client]")
   else:
     log_color("Deepseek API key not found. Falling back to keyword routing.", "y", prefix="[mcp-client]")
 
   if debug:
-    log_color("Debug mode enabled; verbose MCP logs will be displayed.", "d", prefix="[debug]")
+    log_debug("Debug mode enabled; verbose MCP logs will be displayed.")
 
   log_color("Type 'exit' or 'quit' to leave the session.", "w", prefix="[prompt]")
 
-  async with MCPStockClient(server_path=server_path, debug=debug) as client:
+  # Prompt lines arrive through the loop's selector instead of a worker thread.
+  reader = AsyncLineReader()
+  # Warm the shared session in the background so the server spawn overlaps the first prompt.
+  client = get_shared_client(SERVER_PATH, debug=debug)
+  session_task = asyncio.create_task(client.start())
+  prompt_text = log_color("What is your query? → ", "w", prefix="[prompt]", emit=False)
+  # Lifecycle lines are formatted and written by a background task; join it before direct writes.
+  lifecycle = AsyncLifecycleLogger()
+  client.lifecycle = lifecycle
+  try:
     while True:
+      await lifecycle.join()
       try:
-        prompt_text = log_color("What is your query? → ", "w", prefix="[prompt]", emit=False)
-        loop = asyncio.get_running_loop()
-        user_input = await loop.run_in_executor(None, input, prompt_text)
+        user_input = await reader.readline(prompt_text)
       except (EOFError, KeyboardInterrupt):
         log_color("\nGoodbye.", "w")
         break
 
       if debug:
-        log_color(f"[MCP Client] User input: {user_input}", "d", prefix="[debug]")
+        log_debug(f"[MCP Client] User input: {user_input}")
 
-      if user_input.strip().lower() in {"exit", "quit"}:
+      if user_input.strip().lower() in EXIT_COMMANDS:
         log_color("Goodbye.", "w")
         break
 
-      log_lifecycle_event("query", user_input)
+      lifecycle.emit("query", user_input)
 
       try:
-        tool_call = router.route(user_input)
-        analysis_detail = (
-          f"Strategy={tool_call.source}; tool={tool_call.name}; args={tool_call.arguments}"
+        # Routing awaits HTTP, so the session can keep starting in the background.
+        tool_call = await router.route_async(user_input)
+        lifecycle.emit(
+          "analysis",
+          lambda tool_call=tool_call: (
+            f"Strategy={tool_call.source}; tool={tool_call.name}; args={tool_call.arguments}"
+          ),
         )
-        log_lifecycle_event("analysis", analysis_detail)
       except ValueError as exc:
+        await lifecycle.join()
         log_color(f"⚠️  {exc}", "r", prefix="[error]")
         continue
 
       try:
+        await session_task  # returns immediately once the session is up
         response = await client.invoke(tool_call)
-        data = response.get("data") if isinstance(response, dict) else {}
-        if tool_call.name == "get_stock_price":
-          detail = f"Symbol={data.get('symbol', 'UNKNOWN')}; source={data.get('source', 'unknown')}"
-        elif tool_call.name == "compare_stocks":
-          symbol_one = (data or {}).get("symbol_one", {})
-          symbol_two = (data or {}).get("symbol_two", {})
-          detail = (
-            f"Comparison payload ready: {symbol_one.get('symbol', '?')} vs "
-            f"{symbol_two.get('symbol', '?')}"
-          )
-        else:
-          detail = "Received response from tool execution."
-        log_lifecycle_event("prepare", detail)
-        message = render_result(tool_call, response)
-        log_lifecycle_event("final", message)
+        lifecycle.emit("prepare", lambda tool_call=tool_call, response=response: describe_payload(tool_call, response))
+        lifecycle.emit("final", lambda tool_call=tool_call, response=response: render_result(tool_call, response))
       except Exception as exc:  # pylint: disable=broad-except
+        await lifecycle.join()
         log_color(f"⚠️  {exc}", "r", prefix="[error]")
+  finally:
+    client.lifecycle = None
+    reader.close()
+    closes = [lifecycle.aclose(), router.aclose()]
+    if not session_task.done():
+      session_task.cancel()
+    elif not session_task.cancelled() and session_task.exception() is None:
+      closes.append(client.shutdown())
+    # The logger, HTTP client and MCP lease are independent, so close them together.
+    await asyncio.gather(*closes, return_exceptions=True)
+    await _STDIO_POOL.close_idle()
 
 
 def main() -> None:
@@ -326,6 +659,7 @@ def main() -> None:
   )
   parser.set_defaults(debug=True)
   args = parser.parse_args()
+  install_uvloop()
   asyncio.run(interactive_loop(debug=args.debug))
 
 
@@ -1,6 +1,8 @@
+from functools import lru_cache
 from pathlib import Path
 import sys
-from typing import Dict
+from types import MappingProxyType
+from typing import Dict, Mapping
 
 from dotenv import load_dotenv
 
@@ -10,10 +12,13 @@ if str(REPO_ROOT) not in sys.path:
   sys.path.insert(0, str(REPO_ROOT))
 
 from raw_version.server import StockDataProvider
+from utils import fastjson
+from utils.eventloop import install_uvloop
 from utils.utils import log_color
 
 try:  # pragma: no cover - the import is exercised at runtime
   from mcp.server.fastmcp import FastMCP
+  from mcp.types import TextContent
 except ImportError as exc:  # pragma: no cover - deferred dependency
   raise ImportError("Install the 'mcp' package to run the MCP server variant.") from exc
 
@@ -21,36 +26,94 @@ load_dotenv()
 
 CSV_PATH = REPO_ROOT / "stocks_data.csv"
 
-provider = StockDataProvider(csv_path=CSV_PATH)
-server = FastMCP("stocks-mcp")
-
 # Emit server logs to stderr to avoid interfering with stdio transport.
 def log_server(message: str) -> None:
   log_color(message, "p", prefix="[mcp-server]", use_stderr=True)
 
 
-@server.tool()
-def get_stock_price(symbol: str) -> Dict[str, Dict[str, str]]:
+def as_content(payload: Dict[str, object]) -> TextContent:
+  """Serialise a tool payload once so FastMCP sends the text as-is."""
+  return TextContent(type="text", text=fastjson.dumps_str(payload))
+
+
+def get_stock_price(symbol: str) -> TextContent:
   """Lookup a ticker and return the structured price payload."""
+  provider = get_provider()
+  if not provider.live_enabled:
+    # Without a live source every answer is a CSV row, so serve the pre-rendered payload.
+    clean_symbol = symbol.strip().upper()
+    record = get_price_table().get(clean_symbol)
+    if record is not None:
+      log_server(f"Serving MCP get_stock_price for {clean_symbol} via {record['source']}.")
+      return get_price_content()[clean_symbol]
   price = provider.get_stock_price(symbol)
   log_server(f"Serving MCP get_stock_price for {price.symbol} via {price.source}.")
-  return {"data": price.as_dict()}
+  return as_content({"data": price.as_dict()})
 
 
-@server.tool()
-def compare_stocks(symbol_one: str, symbol_two: str) -> Dict[str, Dict[str, str]]:
+def compare_stocks(symbol_one: str, symbol_two: str) -> TextContent:
   """Compare two tickers and return the summary payload."""
-  comparison = provider.compare_stocks(symbol_one, symbol_two)
+  provider = get_provider()
+  if provider.live_enabled:
+    content = as_content({"data": provider.compare_stocks(symbol_one, symbol_two)})
+  else:
+    # CSV prices are fixed for the process lifetime, so the rendered comparison is too.
+    content = _compare_csv(symbol_one.strip().upper(), symbol_two.strip().upper())
   log_server(
     f"Serving MCP compare_stocks for {symbol_one} vs {symbol_two}; summary captured.",
   )
-  return {"data": comparison}
+  return content
+
+
+@lru_cache(maxsize=1024)
+def _compare_csv(symbol_one: str, symbol_two: str) -> TextContent:
+  return as_content({"data": get_provider().compare_stocks(symbol_one, symbol_two)})
+
+
+@lru_cache(maxsize=1)
+def get_provider() -> StockDataProvider:
+  """Return the process-wide data provider, reading the CSV on first use."""
+  return StockDataProvider(csv_path=CSV_PATH)
+
+
+@lru_cache(maxsize=1)
+def get_price_table() -> Mapping[str, Dict[str, str]]:
+  """Return a read-only symbol -> CSV payload table, built once from the provider."""
+  return MappingProxyType({record.symbol: record.as_dict() for record in get_provider().iter_all()})
+
+
+@lru_cache(maxsize=1)
+def get_price_content() -> Mapping[str, TextContent]:
+  """Return the CSV table as ready-to-send ``{"data": ...}`` text content per symbol."""
+  return MappingProxyType(
+    {symbol: as_content({"data": record}) for symbol, record in get_price_table().items()},
+  )
+
+
+@lru_cache(maxsize=1)
+def get_server() -> FastMCP:
+  """Return the process-wide FastMCP server with both tools registered."""
+  server = FastMCP("stocks-mcp")
+  server.add_tool(get_stock_price)
+  server.add_tool(compare_stocks)
+  return server
+
+
+def __getattr__(name: str):
+  # ``provider`` and ``server`` stay importable as attributes but are built lazily.
+  if name == "provider":
+    return get_provider()
+  if name == "server":
+    return get_server()
+  raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def main() -> None:
   """Entrypoint compatible with ``python -m mcp_version.server``."""
   log_server("Starting MCP (fastmcp) server over stdio.")
-  server.run() # (transport="stdio")
+  # anyio's asyncio backend builds its loop through the policy, so this covers the stdio transport.
+  install_uvloop()
+  get_server().run() # (transport="stdio")
 
 
 if __name__ == "__main__":
@@ -9,26 +9,55 @@ keyword-based classifier is used instead so that the workshop remains usable in
 offline settings.
 """
 
-import argparse
-import json
+import asyncio
+import atexit
+import copy
+import itertools
 import os
+import socket
 import subprocess
 import sys
-import uuid
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Optional
+from typing import ContextManager, Dict, FrozenSet, List, Optional, Sequence, Tuple, Union
 
-from dotenv import load_dotenv
-
-from utils.deepseek import DeepseekRouter
+from utils.async_input import AsyncLineReader
+from utils.deepseek import KNOWN_TICKERS, NAME_TO_TICKER, DeepseekRouter
+from utils.framing import PIPE_BUFFER_SIZE, expect_magic, read_frame, write_frame
 from utils.utils import ToolCall, log_color, log_lifecycle_event, render_result
 
+try:
+  import readline
+except ModuleNotFoundError:  # pragma: no cover - optional dependency (absent on Windows)
+  readline = None  # type: ignore[assignment]
+
+# The server lives next to this client in the raw variant.
+SERVER_PATH = Path(__file__).with_name("server.py")
+HISTORY_PATH = Path.home() / ".mcp_workshop_history"
+# Tab-completion candidates: tickers as typed, company names title-cased.
+COMPLETION_WORDS = sorted(KNOWN_TICKERS | {name.title() for name in NAME_TO_TICKER})
+
 
 class StockToolClient:
   """
   Manage the lifecycle of the stock tool server and act as a thin RPC client.
+
+  Requests are pipelined: each one is written immediately and a reader thread
+  matches response frames back to their request ids, so several calls can be in
+  flight on the one pipe while the server works on them concurrently.
+  Successful results are cached per tool and arguments for ``CACHE_TTL_SECONDS``.
   """
 
+  # Prices move, so results are only reused briefly; the cap bounds memory.
+  CACHE_TTL_SECONDS = 30.0
+  CACHE_SIZE = 128
+  # Trailing server log lines kept to explain a failed handshake.
+  STDERR_TAIL_LINES = 20
+
   def __init__(self, server_path: Path, router: DeepseekRouter, debug: bool = True) -> None:
     """
     Create the client wrapper.
@@ -38,7 +67,8 @@ class StockToolClient:
     server_path : Path
         Filesystem path to the stdio server entry point.
     router : DeepseekRouter
-        Router used to turn natural language into tool calls.
+        Router used to turn natural language into tool calls. The caller owns it
+        and closes it; shutting the client down leaves it open.
     debug : bool, optional
         Whether to emit verbose lifecycle logs. Defaults to ``True``.
     """
@@ -49,7 +79,25 @@ class StockToolClient:
     # Toggle extra debug logging from the client helper.
     self.debug = debug
     # The running subprocess (None until started).
-    self.process: Optional[subprocess.Popen[str]] = None
+    self.process: Optional[subprocess.Popen[bytes]] = None
+    # Outstanding requests keyed by id, resolved by the reader thread.
+    self._pending: Dict[int, Future] = {}
+    # Ids only need to be unique within this pipe, so a counter replaces uuid4.
+    self._id_counter = itertools.count(1)
+    self._pending_lock = threading.Lock()
+    # Frames from concurrent callers must not interleave on stdin.
+    self._write_lock = threading.Lock()
+    self._reader: Optional[threading.Thread] = None
+    # Resolved by the reader thread with the handshake frame, or failed if the server never gets ready.
+    self._ready: Optional[Future] = None
+    # Forwards server logs to our stderr, remembering the last few lines for error reports.
+    self._stderr_pump: Optional[threading.Thread] = None
+    self._stderr_tail: "deque[str]" = deque(maxlen=self.STDERR_TAIL_LINES)
+    # Set from the handshake: whether the server accepts ``batch`` request frames.
+    self.supports_batch = False
+    # (tool, arguments) -> (expiry on the monotonic clock, result), least recently used first.
+    self._cache: "OrderedDict[Tuple[str, FrozenSet], Tuple[float, Dict[str, object]]]" = OrderedDict()
+    self._cache_lock = threading.Lock()
 
   def __enter__(self) -> "StockToolClient":
     """
@@ -78,10 +126,20 @@ class StockToolClient:
     """
     self.shutdown()
 
-  def start(self) -> None:
+  def start(self, wait: bool = True) -> None:
     """
     Launch the stdio server subprocess and wait for its ready signal.
 
+    The handshake is read by the reader thread, so with ``wait=False`` this
+    returns as soon as the process is spawned and the server's interpreter
+    start-up overlaps whatever the caller does next. Requests submitted before
+    the handshake arrives are buffered in the pipe until the server reads them.
+
+    Parameters
+    ----------
+    wait : bool, optional
+        Block until the handshake has been received. Defaults to ``True``.
+
     Raises
     ------
     RuntimeError
@@ -92,28 +150,113 @@ class StockToolClient:
 
     # Build the Python command to start the server with unbuffered output.
     command = [sys.executable, "-u", str(self.server_path)]
-    self._log_debug(f"[Client] Starting server with command: {command}")
+    self._log_debug("[Client] Starting server with command: %s", command)
     self.process = subprocess.Popen(
       command,
       stdin=subprocess.PIPE,
       stdout=subprocess.PIPE,
-      stderr=sys.stderr,
-      text=True,
+      stderr=subprocess.PIPE,
+      # Binary pipes with a 64 KiB buffer: no codec layer, and frames rarely need a second read().
+      bufsize=PIPE_BUFFER_SIZE,
     )
 
     if self.process.stdout is None:
       raise RuntimeError("Server stdout pipe is not available.")
 
-    # Wait for the server to print its readiness JSON line.
-    ready_line = self.process.stdout.readline().strip()
-    self._log_debug(f"[Client] Handshake line: {ready_line}")
+    self._stderr_tail.clear()
+    self._stderr_pump = threading.Thread(
+      target=self._pump_stderr,
+      args=(self.process.stderr,),
+      name="stock-tool-stderr",
+      daemon=True,
+    )
+    self._stderr_pump.start()
+    self._ready = Future()
+    self._reader = threading.Thread(
+      target=self._read_responses,
+      args=(self.process.stdout,),
+      name="stock-tool-reader",
+      daemon=True,
+    )
+    self._reader.start()
+    if wait:
+      self.wait_ready()
+
+  def wait_ready(self, timeout: Optional[float] = None) -> Dict[str, object]:
+    """
+    Block until the server's handshake has been received.
+
+    Parameters
+    ----------
+    timeout : float, optional
+        Seconds to wait. Defaults to waiting indefinitely.
+
+    Returns
+    -------
+    Dict[str, object]
+        The handshake frame.
+
+    Raises
+    ------
+    RuntimeError
+        If the server is not running or failed its handshake.
+    """
+    if self._ready is None:
+      raise RuntimeError("Server process is not running.")
+    return self._ready.result(timeout)
+
+  def _handshake(self, stdout) -> Optional[str]:
+    """
+    Read the framing announcement and ready frame, resolving ``_ready``.
+
+    Parameters
+    ----------
+    stdout : BinaryIO
+        Server output stream positioned at the start.
+
+    Returns
+    -------
+    Optional[str]
+        ``None`` on success, otherwise the reason the server is unusable.
+    """
+    assert self._ready is not None
     try:
-      ready_payload = json.loads(ready_line)
-    except json.JSONDecodeError as exc:
-      raise RuntimeError(f"Failed to start server. Output: {ready_line}") from exc
+      expect_magic(stdout)
+      ready_payload = read_frame(stdout)
+    except (OSError, ValueError) as exc:
+      reason = f"Failed to start server: {exc}"
+    else:
+      self._log_debug("[Client] Handshake frame: %s", ready_payload)
+      if not isinstance(ready_payload, dict):
+        reason = f"Failed to start server. Output: {ready_payload}"
+      elif ready_payload.get("type") != "ready":
+        reason = f"Unexpected server handshake: {ready_payload}"
+      else:
+        self.supports_batch = bool(ready_payload.get("batch"))
+        self._ready.set_result(ready_payload)
+        return None
+    if self._stderr_pump is not None:
+      # A server that died during start-up has closed stderr too; let the pump catch its last words.
+      self._stderr_pump.join(timeout=1)
+    if self._stderr_tail:
+      reason += "\nServer stderr:\n" + "".join(self._stderr_tail).rstrip()
+    self._ready.set_exception(RuntimeError(reason))
+    return reason
+
+  def _pump_stderr(self, stderr) -> None:
+    """
+    Copy server log lines to this process's stderr until the server closes the pipe.
 
-    if ready_payload.get("type") != "ready":
-      raise RuntimeError(f"Unexpected server handshake: {ready_payload}")
+    Parameters
+    ----------
+    stderr : BinaryIO
+        Server error stream.
+    """
+    for raw_line in iter(stderr.readline, b""):
+      line = raw_line.decode("utf-8", errors="replace")
+      self._stderr_tail.append(line)
+      sys.stderr.write(line)
+      sys.stderr.flush()
 
   def shutdown(self) -> None:
     """
@@ -124,11 +267,15 @@ class StockToolClient:
 
     if self.process.stdin is not None:
       # Send a shutdown request so the server can exit gracefully.
-      shutdown_payload = {"type": "shutdown", "id": str(uuid.uuid4())}
-      self._log_debug(f"[Client] Sending shutdown payload: {shutdown_payload}")
-      self.process.stdin.write(json.dumps(shutdown_payload) + "\n")
-      self.process.stdin.flush()
-      self.process.stdin.close()
+      shutdown_payload = {"type": "shutdown", "id": next(self._id_counter)}
+      self._log_debug("[Client] Sending shutdown payload: %s", shutdown_payload)
+      try:
+        with self._write_lock:
+          write_frame(self.process.stdin, shutdown_payload)
+        self.process.stdin.close()
+      except OSError:
+        # The server already exited (e.g. it failed during start-up); there is nobody to tell.
+        pass
 
     try:
       self.process.wait(timeout=2)
@@ -136,9 +283,17 @@ class StockToolClient:
       self._log_debug("[Client] Shutdown timed out; killing process.")
       self.process.kill()
     finally:
+      if self._reader is not None:
+        # The reader exits at end of stream once the server has gone.
+        self._reader.join(timeout=2)
+        self._reader = None
+      self._ready = None
+      if self._stderr_pump is not None:
+        self._stderr_pump.join(timeout=2)
+        self._stderr_pump = None
       if self.process.stdout is not None and not self.process.stdout.closed:
         self.process.stdout.close()
-      if self.process.stderr not in (None, sys.stderr):
+      if self.process.stderr is not None and not self.process.stderr.closed:
         self.process.stderr.close()
       self.process = None
 
@@ -159,80 +314,674 @@ class StockToolClient:
     Raises
     ------
     RuntimeError
-        If the server is not running, returns mismatched ids, or reports an error.
+        If the server is not running, closes the pipe, or reports an error.
+    """
+    return self.submit(tool_call).result()
+
+  async def ainvoke(self, tool_call: ToolCall) -> Dict[str, object]:
+    """
+    Awaitable counterpart of :meth:`invoke` that leaves the event loop free while the server works.
+
+    Parameters
+    ----------
+    tool_call : ToolCall
+        Routed tool name and arguments to forward to the server.
+
+    Returns
+    -------
+    Dict[str, object]
+        Response payload containing tool output.
+    """
+    return await asyncio.wrap_future(self.submit(tool_call))
+
+  async def ainvoke_many(self, tool_calls: Sequence[ToolCall]) -> List[Dict[str, object]]:
+    """
+    Awaitable counterpart of :meth:`invoke_batch` that leaves the event loop free.
+
+    Parameters
+    ----------
+    tool_calls : Sequence[ToolCall]
+        Tool calls to dispatch together.
+
+    Returns
+    -------
+    List[Dict[str, object]]
+        One response payload per tool call, in input order.
+
+    Raises
+    ------
+    RuntimeError
+        If the server is not running or any call reports an error.
+    """
+    # invoke_batch blocks on the handshake and the combined response, so run it off the loop.
+    return await asyncio.to_thread(self.invoke_batch, tool_calls)
+
+  def invoke_batch(self, tool_calls: Sequence[ToolCall]) -> List[Dict[str, object]]:
+    """
+    Execute several tool calls in one request frame and return their results in order.
+
+    Servers that do not advertise ``batch`` in their handshake get the calls pipelined
+    as individual requests instead.
+
+    Parameters
+    ----------
+    tool_calls : Sequence[ToolCall]
+        Tool calls to execute.
+
+    Returns
+    -------
+    List[Dict[str, object]]
+        One response payload per tool call.
+
+    Raises
+    ------
+    RuntimeError
+        If the server is not running or any call reports an error.
+    """
+    # ``supports_batch`` is only known once the handshake is in.
+    self.wait_ready()
+    if not self.supports_batch:
+      futures = [self.submit(tool_call) for tool_call in tool_calls]
+      return [future.result() for future in futures]
+
+    payload = {
+      "type": "batch",
+      "calls": [{"tool": tool_call.name, "arguments": tool_call.arguments} for tool_call in tool_calls],
+    }
+    outcomes = self._send(payload, f"batch of {len(tool_calls)} calls").result()
+    results: List[Dict[str, object]] = []
+    for outcome in outcomes:
+      if outcome.get("error") is not None:
+        raise RuntimeError(str(outcome["error"]))
+      results.append(outcome.get("result", {}))
+    return results
+
+  def submit(self, tool_call: ToolCall) -> Future:
+    """
+    Write a tool invocation request without waiting for its response.
+
+    Parameters
+    ----------
+    tool_call : ToolCall
+        Routed tool name and arguments to forward to the server.
+
+    Returns
+    -------
+    concurrent.futures.Future
+        Resolved with the ``result`` payload, or failed with :class:`RuntimeError`.
     """
     if self.process is None or self.process.stdin is None or self.process.stdout is None:
       raise RuntimeError("Server process is not running.")
 
-    # Generate a unique id so request/response lines can be correlated.
-    request_id = str(uuid.uuid4())
+    try:
+      cache_key: Optional[Tuple[str, FrozenSet]] = (tool_call.name, frozenset(tool_call.arguments.items()))
+    except TypeError:
+      # Unhashable argument values (lists, objects) are sent uncached.
+      cache_key = None
+    cached = self._cached_result(cache_key) if cache_key is not None else None
+    if cached is not None:
+      log_lifecycle_event("mcp", f"Serving {tool_call.name} {tool_call.arguments} from the result cache")
+      future: Future = Future()
+      future.set_result(cached)
+      return future
+
     payload = {
       "type": "invoke",
-      "id": request_id,
       "tool": tool_call.name,
       "arguments": tool_call.arguments,
     }
-    log_lifecycle_event(
-      "mcp",
-      f"Dispatching request {request_id} to {tool_call.name} with arguments {tool_call.arguments}",
-    )
-    self._log_debug(f"[Client] Sending request: {payload}")
-
-    self.process.stdin.write(json.dumps(payload) + "\n")
-    self.process.stdin.flush()
-
-    # Read a single response line back from the server.
-    response_line = self.process.stdout.readline().strip()
-    self._log_debug(f"[Client] Raw response line: {response_line}")
-    if not response_line:
-      raise RuntimeError("Server returned an empty response.")
-
-    response_payload = json.loads(response_line)
-    # Track the response lifecycle for observability.
-    log_lifecycle_event(
-      "mcp",
-      f"Received response for request {request_id} with keys {list(response_payload.keys())}",
-    )
-    # Validate that the correlation id matches the request we sent.
-    if response_payload.get("id") != request_id:
-      raise RuntimeError("Server response did not match the request id.")
+    future = self._send(payload, f"{tool_call.name} with arguments {tool_call.arguments}")
+    if cache_key is not None:
+      future.add_done_callback(lambda done: self._remember_result(cache_key, done))
+    return future
 
-    if "error" in response_payload and response_payload["error"] is not None:
-      raise RuntimeError(str(response_payload["error"]))
+  def _send(self, payload: Dict[str, object], description: str) -> Future:
+    """
+    Stamp ``payload`` with a fresh id, register its future and write the frame.
 
-    return response_payload.get("result", {})
+    Parameters
+    ----------
+    payload : Dict[str, object]
+        Request frame without an ``id``.
+    description : str
+        Short text for the dispatch lifecycle log.
 
-  def _log_debug(self, message: str) -> None:
+    Returns
+    -------
+    concurrent.futures.Future
+        Resolved by the reader thread with the response ``result``.
+    """
+    if self.process is None or self.process.stdin is None:
+      raise RuntimeError("Server process is not running.")
+    if self._ready is not None and self._ready.done() and self._ready.exception() is not None:
+      # The reader has already given up, so nothing would ever resolve this request.
+      raise RuntimeError(str(self._ready.exception()))
+
+    # A per-client counter is enough to correlate request/response frames.
+    request_id = next(self._id_counter)
+    payload["id"] = request_id
+    log_lifecycle_event("mcp", f"Dispatching request {request_id} to {description}")
+    self._log_debug("[Client] Sending request: %s", payload)
+
+    future: Future = Future()
+    with self._pending_lock:
+      self._pending[request_id] = future
+    try:
+      with self._write_lock:
+        write_frame(self.process.stdin, payload)
+    except OSError as exc:
+      with self._pending_lock:
+        self._pending.pop(request_id, None)
+      raise RuntimeError(f"Failed to send request to server: {exc}") from exc
+    return future
+
+  def invalidate(self, tool: Optional[str] = None) -> None:
+    """
+    Drop cached results so the next calls go to the server.
+
+    Parameters
+    ----------
+    tool : str, optional
+        Only forget results of this tool. Defaults to clearing everything.
+    """
+    with self._cache_lock:
+      if tool is None:
+        self._cache.clear()
+        return
+      for key in [key for key in self._cache if key[0] == tool]:
+        del self._cache[key]
+
+  def _cached_result(self, key: Tuple[str, FrozenSet]) -> Optional[Dict[str, object]]:
+    """
+    Return a fresh cached result for ``key``, dropping it if expired.
+
+    Parameters
+    ----------
+    key : Tuple[str, FrozenSet]
+        Tool name and frozen argument items.
+
+    Returns
+    -------
+    Optional[Dict[str, object]]
+        Cached result payload, or ``None`` on a miss.
+    """
+    with self._cache_lock:
+      entry = self._cache.get(key)
+      if entry is None:
+        return None
+      expiry, result = entry
+      if time.monotonic() >= expiry:
+        del self._cache[key]
+        return None
+      self._cache.move_to_end(key)
+    # Each hit gets its own copy, so one caller editing its payload cannot change another's.
+    return copy.deepcopy(result)
+
+  def _remember_result(self, key: Tuple[str, FrozenSet], future: Future) -> None:
+    """
+    Cache a successful result, evicting the least recently used entry when full.
+
+    Parameters
+    ----------
+    key : Tuple[str, FrozenSet]
+        Tool name and frozen argument items.
+    future : Future
+        Completed request future; failures are not cached.
+    """
+    if future.cancelled() or future.exception() is not None:
+      return
+    # The first caller keeps the object its future holds, so the cache stores a copy.
+    result = copy.deepcopy(future.result())
+    with self._cache_lock:
+      self._cache[key] = (time.monotonic() + self.CACHE_TTL_SECONDS, result)
+      self._cache.move_to_end(key)
+      if len(self._cache) > self.CACHE_SIZE:
+        self._cache.popitem(last=False)
+
+  def _read_responses(self, stdout) -> None:
+    """
+    Resolve pending requests from response frames until the server closes stdout.
+
+    Parameters
+    ----------
+    stdout : BinaryIO
+        Server output stream positioned at the start; the handshake is read first.
+    """
+    failure = self._handshake(stdout)
+    reason = failure or "Server returned an empty response."
+    # Response bodies are read into one reused buffer instead of a new bytes object each.
+    read_buffer = bytearray(PIPE_BUFFER_SIZE)
+    while failure is None:
+      try:
+        response_payload = read_frame(stdout, read_buffer)
+      except (OSError, ValueError) as exc:
+        reason = f"Server stream failed: {exc}"
+        break
+      if response_payload is None:
+        break
+      self._log_debug("[Client] Raw response frame: %s", response_payload)
+      if not isinstance(response_payload, dict):
+        continue
+
+      request_id = response_payload.get("id")
+      with self._pending_lock:
+        future = self._pending.pop(request_id, None)
+      if future is None:
+        # Shutdown acknowledgements and id-less errors have no waiting caller.
+        continue
+
+      # Track the response lifecycle for observability.
+      log_lifecycle_event(
+        "mcp",
+        f"Received response for request {request_id} with keys {list(response_payload.keys())}",
+      )
+      if "error" in response_payload and response_payload["error"] is not None:
+        future.set_exception(RuntimeError(str(response_payload["error"])))
+      else:
+        future.set_result(response_payload.get("result", {}))
+
+    # Anything still waiting will never be answered.
+    with self._pending_lock:
+      pending, self._pending = self._pending, {}
+    for future in pending.values():
+      future.set_exception(RuntimeError(reason))
+
+  def _log_debug(self, message: str, *args: object) -> None:
     """
     Emit debug logs when debug mode is enabled.
 
     Parameters
     ----------
     message : str
-        Text to log with the debug colour palette.
+        Text to log with the debug colour palette; may hold ``%s`` placeholders.
+    *args : object
+        Values for the placeholders, formatted only when debug mode is on.
+    """
+    if self.debug:
+      log_color(message % args if args else message, "d", prefix="[debug]")
+
+
+class SocketToolClient:
+  """
+  Forward tool calls to a ``--daemon`` client over its Unix socket.
+
+  The daemon owns a long-lived :class:`StockToolClient`, so connecting here costs
+  a few milliseconds instead of spawning and importing a fresh server. Requests
+  and responses use the same length-prefixed frames as the stdio protocol.
+  """
+
+  def __init__(self, socket_path: Path, debug: bool = True) -> None:
+    """
+    Create the socket client wrapper.
+
+    Parameters
+    ----------
+    socket_path : Path
+        Filesystem path of the daemon's Unix socket.
+    debug : bool, optional
+        Whether to emit verbose lifecycle logs. Defaults to ``True``.
+    """
+    self.socket_path = socket_path
+    self.debug = debug
+    self._socket: Optional[socket.socket] = None
+    self._stream = None
+    # One request/response exchange at a time on the shared connection.
+    self._lock = threading.Lock()
+
+  def __enter__(self) -> "SocketToolClient":
+    """
+    Enter the context manager by connecting to the daemon.
+
+    Returns
+    -------
+    SocketToolClient
+        The connected client instance.
+    """
+    self.connect()
+    return self
+
+  def __exit__(self, exc_type, exc, traceback) -> None:  # type: ignore[override]
+    """
+    Exit the context manager by closing the connection.
+
+    Parameters
+    ----------
+    exc_type : type
+        Exception type if one was raised inside the context.
+    exc : BaseException
+        Exception instance if present.
+    traceback : TracebackType
+        Traceback associated with the exception, if any.
+    """
+    self.close()
+
+  def connect(self) -> None:
+    """
+    Open the connection to the daemon.
+
+    Raises
+    ------
+    OSError
+        If no daemon is listening on ``socket_path``.
+    """
+    if self._socket is not None:
+      return
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+      sock.connect(str(self.socket_path))
+    except OSError:
+      sock.close()
+      raise
+    self._socket = sock
+    self._stream = sock.makefile("rwb", buffering=PIPE_BUFFER_SIZE)
+    self._log_debug("[Client] Connected to daemon at %s", self.socket_path)
+
+  def close(self) -> None:
+    """
+    Close the connection; the daemon and its server keep running.
+    """
+    if self._stream is not None:
+      self._stream.close()
+      self._stream = None
+    if self._socket is not None:
+      self._socket.close()
+      self._socket = None
+
+  def invoke(self, tool_call: ToolCall) -> Dict[str, object]:
+    """
+    Send a tool invocation to the daemon and return the parsed response.
+
+    Parameters
+    ----------
+    tool_call : ToolCall
+        Routed tool name and arguments to forward.
+
+    Returns
+    -------
+    Dict[str, object]
+        Response payload containing tool output.
+
+    Raises
+    ------
+    RuntimeError
+        If the connection is closed or the daemon reports an error.
     """
+    log_lifecycle_event("mcp", f"Dispatching {tool_call.name} with arguments {tool_call.arguments} to the daemon")
+    return self._exchange({"type": "invoke", "tool": tool_call.name, "arguments": tool_call.arguments})
+
+  async def ainvoke(self, tool_call: ToolCall) -> Dict[str, object]:
+    """
+    Awaitable counterpart of :meth:`invoke`; the socket exchange runs on a worker thread.
+
+    Parameters
+    ----------
+    tool_call : ToolCall
+        Routed tool name and arguments to forward.
+
+    Returns
+    -------
+    Dict[str, object]
+        Response payload containing tool output.
+    """
+    return await asyncio.to_thread(self.invoke, tool_call)
+
+  def invalidate(self, tool: Optional[str] = None) -> None:
+    """
+    Ask the daemon to drop cached results.
+
+    Parameters
+    ----------
+    tool : str, optional
+        Only forget results of this tool. Defaults to clearing everything.
+    """
+    self._exchange({"type": "invalidate", "tool": tool})
+
+  def _exchange(self, payload: Dict[str, object]) -> Dict[str, object]:
+    if self._stream is None:
+      raise RuntimeError("Not connected to the daemon.")
+    self._log_debug("[Client] Sending daemon request: %s", payload)
+    with self._lock:
+      try:
+        write_frame(self._stream, payload)
+        response = read_frame(self._stream)
+      except (OSError, ValueError) as exc:
+        raise RuntimeError(f"Daemon connection failed: {exc}") from exc
+    if not isinstance(response, dict):
+      raise RuntimeError("Daemon closed the connection.")
+    if response.get("error") is not None:
+      raise RuntimeError(str(response["error"]))
+    return response.get("result", {})
+
+  def _log_debug(self, message: str, *args: object) -> None:
     if self.debug:
-      log_color(message, "d", prefix="[debug]")
+      log_color(message % args if args else message, "d", prefix="[debug]")
+
+
+def serve_daemon(socket_path: Path, debug: bool = True) -> None:
+  """
+  Keep one stock tool server alive and serve tool calls on a Unix socket.
+
+  Each connection gets its own thread; calls from all of them are pipelined to
+  the shared server and share its result cache. Runs until interrupted.
+
+  Parameters
+  ----------
+  socket_path : Path
+      Filesystem path to listen on; a stale socket file is replaced.
+  debug : bool, optional
+      Whether to show verbose logs. Defaults to ``True``.
+
+  Raises
+  ------
+  RuntimeError
+      If another daemon already answers on ``socket_path``.
+  """
+  if _daemon_answers(socket_path):
+    raise RuntimeError(f"A daemon is already listening on {socket_path}.")
+  router = DeepseekRouter(api_key=None, debug=debug)
+  with router, StockToolClient(server_path=SERVER_PATH, router=router, debug=debug) as client:
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+      # Nothing answered the probe above, so any socket file left here is stale.
+      if socket_path.is_socket():
+        socket_path.unlink()
+      listener.bind(str(socket_path))
+      listener.listen()
+      log_color(f"Daemon listening on {socket_path}", "w", prefix="[mcp-client]")
+      while True:
+        connection, _ = listener.accept()
+        threading.Thread(
+          target=_serve_connection,
+          args=(client, connection),
+          name="stock-tool-daemon-conn",
+          daemon=True,
+        ).start()
+    except KeyboardInterrupt:
+      log_color("Daemon stopped.", "w", prefix="[mcp-client]")
+    finally:
+      listener.close()
+      if socket_path.is_socket():
+        socket_path.unlink()
+
+
+def _daemon_answers(socket_path: Path) -> bool:
+  if not socket_path.is_socket():
+    return False
+  probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+  try:
+    probe.connect(str(socket_path))
+  except OSError:
+    # Refused: the file outlived the daemon that created it.
+    return False
+  finally:
+    probe.close()
+  return True
+
+
+def _serve_connection(client: StockToolClient, connection: socket.socket) -> None:
+  with connection, connection.makefile("rwb", buffering=PIPE_BUFFER_SIZE) as stream:
+    read_buffer = bytearray(PIPE_BUFFER_SIZE)
+    while True:
+      try:
+        request = read_frame(stream, read_buffer)
+      except ValueError as exc:
+        write_frame(stream, {"error": str(exc)})
+        return
+      except OSError:
+        return
+      if request is None:
+        return
+      try:
+        if request.get("type") == "invalidate":
+          client.invalidate(request.get("tool"))
+          response = {"result": {}}
+        else:
+          response = {"result": client.invoke(ToolCall(request["tool"], request.get("arguments") or {}))}
+      except Exception as exc:  # pylint: disable=broad-except
+        response = {"error": str(exc)}
+      try:
+        write_frame(stream, response)
+      except OSError:
+        return
 
 
-def interactive_loop(debug: bool = True) -> None:
+def open_tool_client(
+  router: DeepseekRouter,
+  debug: bool = True,
+  socket_path: Optional[Path] = None,
+) -> ContextManager[Union[StockToolClient, SocketToolClient]]:
+  """
+  Connect to a running daemon when one is listening, otherwise spawn a server.
+
+  Parameters
+  ----------
+  router : DeepseekRouter
+      Router handed to a spawned :class:`StockToolClient`.
+  debug : bool, optional
+      Whether to show verbose logs. Defaults to ``True``.
+  socket_path : Path, optional
+      Daemon socket to try first. Defaults to always spawning.
+
+  Returns
+  -------
+  ContextManager
+      A started client that exposes ``invoke`` and ``invalidate``.
+  """
+  if socket_path is not None:
+    client = SocketToolClient(socket_path, debug=debug)
+    try:
+      client.connect()
+      return client
+    except OSError as exc:
+      if debug:
+        log_color(f"[Client] No daemon at {socket_path} ({exc}); spawning a server.", "d", prefix="[debug]")
+  client = StockToolClient(server_path=SERVER_PATH, router=router, debug=debug)
+  # Let the server import its dependencies while the user types; the first call waits if needed.
+  log_color("Starting the stock tool server…", "w", prefix="[mcp-client]")
+  client.start(wait=False)
+  return client
+
+
+def complete_symbol(text: str, state: int) -> Optional[str]:
+  """
+  ``readline`` completer offering known tickers and company names.
+
+  Parameters
+  ----------
+  text : str
+      Word fragment under the cursor.
+  state : int
+      Index of the candidate requested by ``readline``.
+
+  Returns
+  -------
+  Optional[str]
+      The ``state``-th matching word, or ``None`` once the matches run out.
+  """
+  prefix = text.upper()
+  matches = [word for word in COMPLETION_WORDS if word.upper().startswith(prefix)]
+  return matches[state] if state < len(matches) else None
+
+
+def enable_line_editing(history_path: Path = HISTORY_PATH) -> None:
+  """
+  Turn on ``input()`` history and symbol completion for interactive terminals.
+
+  Parameters
+  ----------
+  history_path : Path, optional
+      File that keeps prompts between sessions. Defaults to ``~/.mcp_workshop_history``.
+  """
+  if readline is None or sys.stdin is None or not sys.stdin.isatty():
+    return
+  try:
+    readline.read_history_file(history_path)
+  except (FileNotFoundError, PermissionError):
+    pass
+  atexit.register(_save_history, history_path)
+  readline.set_completer(complete_symbol)
+  readline.parse_and_bind("tab: complete")
+
+
+def _save_history(history_path: Path) -> None:
+  try:
+    readline.write_history_file(history_path)
+  except OSError:
+    pass
+
+
+# Bound between pipeline stages so read-ahead from a pasted batch cannot run away.
+PIPELINE_QUEUE_SIZE = 4
+
+
+@dataclass
+class QueryTurn:
+  """
+  One prompt moving through the route → invoke → render pipeline.
+  """
+
+  user_input: str
+  # Set on the first stage to fail; later stages pass the turn through to be reported.
+  error: Optional[str] = None
+  tool_call: Optional[ToolCall] = None
+  response: Optional[Dict[str, object]] = None
+  # ``refresh`` travels the pipeline too, so it clears the cache after earlier queries finish.
+  refresh: bool = False
+  done: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+def interactive_loop(debug: bool = True, socket_path: Optional[Path] = None) -> None:
   """
   Run the interactive REPL loop that powers the workshop client.
 
+  Each prompt passes through route, invoke and render stages connected by
+  bounded queues, so with piped input the routing of one query overlaps the
+  tool call of the previous one. Terminal sessions wait for each answer before
+  prompting again.
+
   Parameters
   ----------
   debug : bool, optional
       Whether to show verbose logs. Defaults to ``True``.
+  socket_path : Path, optional
+      Daemon socket to use instead of spawning a server, when one is listening.
   """
+  asyncio.run(_interactive_session(debug=debug, socket_path=socket_path))
+
+
+async def _interactive_session(debug: bool, socket_path: Optional[Path]) -> None:
+  from dotenv import load_dotenv  # deferred so importing the client stays cheap
+
   load_dotenv()
   # Pull the Deepseek key for routing; fall back to heuristics if absent.
   api_key = os.getenv("DEEPSEEK_KEY")
   # Router remains a dependency even when heuristics are used.
   router = DeepseekRouter(api_key=api_key, debug=debug)
-  # The server lives next to this client in the raw variant.
-  server_path = Path(__file__).with_name("server.py")
+  enable_line_editing()
 
   if api_key:
+    # Handshake with the API while the banner prints and the user types.
+    threading.Thread(target=router.warm_up, name="deepseek-warm-up", daemon=True).start()
     log_color("Deepseek routing is enabled.", "y", prefix="[mcp-client]")
   else:
     log_color("Deepseek API key not found. Falling back to keyword routing.", "y", prefix="[mcp-client]")
@@ -240,67 +989,153 @@ def interactive_loop(debug: bool = True) -> None:
   if debug:
     log_color("Debug mode enabled; verbose logs will be displayed.", "d", prefix="[debug]")
 
-  log_color("Type 'exit' or 'quit' to leave the session.", "w", prefix="[prompt]")
+  log_color("Type 'exit' or 'quit' to leave the session, 'refresh' to drop cached prices.", "w", prefix="[prompt]")
+
+  # The session owns the router, so its pooled HTTP connection closes when the session ends.
+  with router, open_tool_client(router, debug=debug, socket_path=socket_path) as client:
+    route_queue: "asyncio.Queue[Optional[QueryTurn]]" = asyncio.Queue(PIPELINE_QUEUE_SIZE)
+    invoke_queue: "asyncio.Queue[Optional[QueryTurn]]" = asyncio.Queue(PIPELINE_QUEUE_SIZE)
+    render_queue: "asyncio.Queue[Optional[QueryTurn]]" = asyncio.Queue(PIPELINE_QUEUE_SIZE)
+    workers = [
+      asyncio.create_task(_route_stage(router, route_queue, invoke_queue)),
+      asyncio.create_task(_invoke_stage(client, invoke_queue, render_queue)),
+      asyncio.create_task(_render_stage(render_queue)),
+    ]
+    try:
+      farewell = await _read_prompts(route_queue, debug)
+      # The sentinel flows through every stage, so this returns once all queued turns are rendered.
+      await asyncio.gather(*workers)
+      log_color(farewell, "w")
+    finally:
+      for worker in workers:
+        worker.cancel()
+
+
+async def _read_prompts(route_queue: "asyncio.Queue[Optional[QueryTurn]]", debug: bool) -> str:
+  # Interleaving answers with a live prompt is confusing; only piped input reads ahead.
+  wait_for_answer = sys.stdin is not None and sys.stdin.isatty()
+  # Terminals keep readline editing and history; pipes are read from the loop's selector.
+  with AsyncLineReader(line_editing=True) as prompts:
+    while True:
+      try:
+        # Render the coloured prompt without emitting a newline early.
+        prompt_text = log_color("What is your query? → ", "w", prefix="[prompt]", emit=False)
+        user_input = (await prompts.readline(prompt_text)).strip()
+      except EOFError:
+        farewell = "\nGoodbye."
+        break
+      if debug:
+        log_color(f"[Client] User input: {user_input}", "d", prefix="[debug]")
+
+      if user_input.lower() in {"exit", "quit"}:
+        farewell = "Goodbye."
+        break
+
+      turn = QueryTurn(user_input, refresh=user_input.lower() == "refresh")
+      await route_queue.put(turn)
+      if wait_for_answer:
+        await turn.done.wait()
+  await route_queue.put(None)
+  return farewell
+
+
+async def _route_stage(
+  router: DeepseekRouter,
+  route_queue: "asyncio.Queue[Optional[QueryTurn]]",
+  invoke_queue: "asyncio.Queue[Optional[QueryTurn]]",
+) -> None:
+  while True:
+    turn = await route_queue.get()
+    if turn is not None and not turn.refresh:
+      # Track the raw query event for downstream logging/analytics.
+      log_lifecycle_event("query", turn.user_input)
+      try:
+        # Route the prompt to a tool call (AI when available; heuristics otherwise).
+        turn.tool_call = await router.route_async(turn.user_input)
+        log_lifecycle_event(
+          "analysis",
+          f"Strategy={turn.tool_call.source}; tool={turn.tool_call.name}; args={turn.tool_call.arguments}",
+        )
+      except Exception as exc:  # pylint: disable=broad-except
+        # Every turn must reach the render stage, or a terminal session waits on it forever.
+        turn.error = str(exc)
+    await invoke_queue.put(turn)
+    if turn is None:
+      return
+
+
+async def _invoke_stage(
+  client: Union[StockToolClient, SocketToolClient],
+  invoke_queue: "asyncio.Queue[Optional[QueryTurn]]",
+  render_queue: "asyncio.Queue[Optional[QueryTurn]]",
+) -> None:
+  while True:
+    turn = await invoke_queue.get()
+    try:
+      if turn is not None and turn.refresh:
+        # The daemon client invalidates over its socket, so keep that blocking I/O off the loop.
+        await asyncio.to_thread(client.invalidate)
+      elif turn is not None and turn.error is None:
+        # Dispatch the tool invocation; rendering happens in the next stage.
+        turn.response = await client.ainvoke(turn.tool_call)
+    except Exception as exc:  # pylint: disable=broad-except
+      turn.error = str(exc)
+    await render_queue.put(turn)
+    if turn is None:
+      return
 
-  try:
-    with StockToolClient(server_path=server_path, router=router, debug=debug) as client:
-      while True:
-        try:
-          # Render the coloured prompt without emitting a newline early.
-          prompt_text = log_color("What is your query? → ", "w", prefix="[prompt]", emit=False)
-          user_input = input(prompt_text).strip()
-        except EOFError:
-          log_color("\nGoodbye.", "w")
-          break
-        if debug:
-          log_color(f"[Client] User input: {user_input}", "d", prefix="[debug]")
-
-        if user_input.lower() in {"exit", "quit"}:
-          log_color("Goodbye.", "w")
-          break
-
-        # Track the raw query event for downstream logging/analytics.
-        log_lifecycle_event("query", user_input)
-
-        try:
-          # Route the prompt to a tool call (AI when available; heuristics otherwise).
-          tool_call = router.route(user_input)
-          analysis_detail = (
-            f"Strategy={tool_call.source}; tool={tool_call.name}; args={tool_call.arguments}"
-          )
-          log_lifecycle_event("analysis", analysis_detail)
-        except ValueError as exc:
-          log_color(f"⚠️  {exc}", "r", prefix="[error]")
-          continue
-
-        try:
-          # Dispatch the tool invocation and render the structured result.
-          response = client.invoke(tool_call)
-          data = response.get("data") if isinstance(response, dict) else {}
-          if tool_call.name == "get_stock_price":
-            detail = f"Symbol={data.get('symbol', 'UNKNOWN')}; source={data.get('source', 'unknown')}"
-          elif tool_call.name == "compare_stocks":
-            symbol_one = (data or {}).get("symbol_one", {})
-            symbol_two = (data or {}).get("symbol_two", {})
-            detail = (
-              f"Comparison payload ready: {symbol_one.get('symbol', '?')} vs "
-              f"{symbol_two.get('symbol', '?')}"
-            )
-          else:
-            detail = "Received response from tool execution."
-          log_lifecycle_event("prepare", detail)
-          message = render_result(tool_call, response)
-          log_lifecycle_event("final", message)
-        except Exception as exc:  # pylint: disable=broad-except
-          log_color(f"⚠️  {exc}", "r", prefix="[error]")
-  finally:
-    pass
+
+async def _render_stage(render_queue: "asyncio.Queue[Optional[QueryTurn]]") -> None:
+  while True:
+    turn = await render_queue.get()
+    if turn is None:
+      return
+    try:
+      if turn.error is not None:
+        log_color(f"⚠️  {turn.error}", "r", prefix="[error]")
+      elif turn.refresh:
+        log_color("Cached results cleared.", "w", prefix="[prompt]")
+      else:
+        _render_turn(turn.tool_call, turn.response)
+    except Exception as exc:  # pylint: disable=broad-except
+      log_color(f"⚠️  {exc}", "r", prefix="[error]")
+    finally:
+      turn.done.set()
+
+
+def _describe_price(data: Dict[str, object]) -> str:
+  return f"Symbol={data.get('symbol', 'UNKNOWN')}; source={data.get('source', 'unknown')}"
+
+
+def _describe_comparison(data: Dict[str, object]) -> str:
+  symbol_one = data.get("symbol_one") or {}
+  symbol_two = data.get("symbol_two") or {}
+  return f"Comparison payload ready: {symbol_one.get('symbol', '?')} vs {symbol_two.get('symbol', '?')}"
+
+
+def _describe_other(data: Dict[str, object]) -> str:
+  return "Received response from tool execution."
+
+
+# Tool name -> "prepare" lifecycle detail built from the response data.
+RESPONSE_DESCRIBERS = {
+  "get_stock_price": _describe_price,
+  "compare_stocks": _describe_comparison,
+}
+
+
+def _render_turn(tool_call: ToolCall, response: Dict[str, object]) -> None:
+  data = (response.get("data") if isinstance(response, dict) else None) or {}
+  log_lifecycle_event("prepare", RESPONSE_DESCRIBERS.get(tool_call.name, _describe_other)(data))
+  log_lifecycle_event("final", render_result(tool_call, response))
 
 
 def main() -> None:
   """
   Parse CLI flags and start the interactive client.
   """
+  import argparse
+
   parser = argparse.ArgumentParser(description="Interact with the Deepseek MCP workshop client.")
   parser.add_argument(
     "--no-debug",
@@ -308,9 +1143,30 @@ def main() -> None:
     action="store_false",
     help="Disable verbose debug logging (default: enabled).",
   )
+  parser.add_argument(
+    "--socket",
+    dest="socket_path",
+    type=Path,
+    help="Unix socket of a running daemon; queries use it instead of spawning a server when it is up.",
+  )
+  parser.add_argument(
+    "--daemon",
+    action="store_true",
+    help="Keep a server running and serve tool calls on --socket until interrupted.",
+  )
   parser.set_defaults(debug=True)
   args = parser.parse_args()
-  interactive_loop(debug=args.debug)
+  if args.daemon:
+    if args.socket_path is None:
+      parser.error("--daemon requires --socket PATH")
+    if not hasattr(socket, "AF_UNIX"):
+      parser.error("--daemon needs Unix domain sockets, which this platform lacks")
+    try:
+      serve_daemon(args.socket_path, debug=args.debug)
+    except RuntimeError as exc:
+      parser.exit(1, f"{exc}\n")
+    return
+  interactive_loop(debug=args.debug, socket_path=args.socket_path)
 
 
 if __name__ == "__main__":
@@ -3,17 +3,26 @@ Stock data tool server for the Deepseek-powered MCP workshop.
 
 This module exposes two tools via a lightweight stdio protocol so that the
 interactive client can request stock data. The implementation favours a simple
-line-delimited JSON contract to stay close to the Model Context Protocol style
-while remaining easy to reason about in a standalone workshop environment.
+length-prefixed JSON contract (see :mod:`utils.framing`) to stay close to the
+Model Context Protocol style while remaining easy to reason about in a
+standalone workshop environment.
 """
 
 from __future__ import annotations
 
+import csv
+import importlib.util
 import json
 import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Iterable, Optional
+from types import MappingProxyType
+from typing import BinaryIO, Dict, Iterable, Mapping, Optional, Tuple, Union
 
 from dotenv import load_dotenv
 
@@ -22,18 +31,52 @@ if str(REPO_ROOT) not in sys.path:
   sys.path.insert(0, str(REPO_ROOT))
   # Ensure local utilities resolve when the server is launched as a script.
 
+from utils import fastjson
+from utils.framing import PIPE_BUFFER_SIZE, read_frame, write_frame, write_frame_bytes, write_magic
 from utils.utils import log_color
 
-try:
-  import yfinance as yf
-except ModuleNotFoundError:  # pragma: no cover - optional dependency
-  yf = None  # type: ignore[assignment]
+# yfinance pulls in pandas and numpy, so it is imported on the first live lookup rather than
+# before the handshake: ``None`` until then, ``False`` once it is known to be missing.
+_yf = None
 
 SERVER_PREFIX = "[mcp-server]"
 SERVER_COLOR = "p"
 # Colour palette constants so client/server logs stay visually aligned.
 
 
+@lru_cache(maxsize=None)
+def yfinance_available() -> bool:
+  """
+  Report whether :mod:`yfinance` is installed, without importing it.
+
+  Returns
+  -------
+  bool
+      ``True`` when the package can be found on the import path.
+  """
+  return importlib.util.find_spec("yfinance") is not None
+
+
+def load_yfinance():
+  """
+  Import :mod:`yfinance` on first use and return it.
+
+  Returns
+  -------
+  module or None
+      The :mod:`yfinance` module, or ``None`` when it is not installed.
+  """
+  global _yf
+  if _yf is None:
+    try:
+      import yfinance  # pylint: disable=import-outside-toplevel
+    except ModuleNotFoundError:  # pragma: no cover - optional dependency
+      _yf = False
+    else:
+      _yf = yfinance
+  return _yf or None
+
+
 def log_server(message: str) -> None:
   """
   Emit colourised server-side lifecycle logs to stderr.
@@ -43,8 +86,8 @@ def log_server(message: str) -> None:
   message : str
       Human-readable status text.
   """
-  formatted = log_color(message, SERVER_COLOR, prefix=SERVER_PREFIX, emit=False)
-  print(formatted, file=sys.stderr, flush=True)
+  # One write of line plus newline; print() would issue two on the unbuffered stderr.
+  log_color(message, SERVER_COLOR, prefix=SERVER_PREFIX, use_stderr=True)
 
 
 @dataclass
@@ -81,6 +124,22 @@ class StockPrice:
       "source": self.source,
     }
 
+  def as_json_bytes(self) -> bytes:
+    """
+    Serialise :meth:`as_dict` straight to compact JSON bytes without building the dictionary.
+
+    Returns
+    -------
+    bytes
+        UTF-8 JSON object with the same keys and formatting as :meth:`as_dict`.
+    """
+    # The symbol comes from the caller, so it still goes through the encoder for escaping.
+    return b'{"symbol":%b,"price":"%.2f","source":%b}' % (
+      fastjson.dumps(self.symbol),
+      self.price,
+      fastjson.dumps(self.source),
+    )
+
 
 class StockDataProvider:
   """
@@ -88,9 +147,18 @@ class StockDataProvider:
 
   The provider first attempts a live lookup using :mod:`yfinance`. If the network
   call fails or produces no price, it falls back to a deterministic CSV dataset
-  located in the repository root.
+  located in the repository root. Resolved prices are reused for
+  ``QUOTE_TTL_SECONDS`` so a symbol asked again moments later skips the network,
+  and concurrent requests for a symbol already being fetched wait for that one
+  lookup instead of starting their own.
   """
 
+  # Long enough to absorb repeated questions, short enough that live quotes stay current.
+  QUOTE_TTL_SECONDS = 30.0
+  QUOTE_CACHE_SIZE = 256
+  # How long a symbol whose intraday history came back empty skips that fallback.
+  HISTORY_RETRY_SECONDS = 60.0
+
   def __init__(self, csv_path: Path = Path("stocks_data.csv")) -> None:
     """
     Build a provider instance.
@@ -103,6 +171,40 @@ class StockDataProvider:
     self.csv_path = csv_path
     # Preload fallback prices so repeated lookups stay in-memory and fast.
     self._fallback_prices = self._load_csv(csv_path)
+    # symbol -> (expiry on the monotonic clock, price), least recently used first.
+    self._quote_cache: "OrderedDict[str, Tuple[float, StockPrice]]" = OrderedDict()
+    # symbol -> monotonic time before which the history fallback is not retried.
+    self._history_retry_at: Dict[str, float] = {}
+    # Created on the first live comparison; CSV-only providers never start it.
+    self._lookup_pool: Optional[ThreadPoolExecutor] = None
+    # symbol -> lookup in progress, shared by concurrent callers.
+    self._inflight: Dict[str, Future] = {}
+    # Tool calls run on a thread pool.
+    self._quote_lock = threading.Lock()
+
+  @property
+  def live_enabled(self) -> bool:
+    """
+    Whether live quotes can be attempted at all.
+
+    Returns
+    -------
+    bool
+        ``False`` when :mod:`yfinance` is not installed, so every lookup resolves from the CSV.
+    """
+    return yfinance_available()
+
+  def iter_all(self) -> Iterable[StockPrice]:
+    """
+    Iterate over every preloaded fallback price.
+
+    Returns
+    -------
+    Iterable[StockPrice]
+        One ``fallback_csv`` record per symbol in the CSV dataset.
+    """
+    for symbol, price in self._fallback_prices.items():
+      yield StockPrice(symbol, price, "fallback_csv")
 
   def get_stock_price(self, symbol: str) -> StockPrice:
     """
@@ -128,11 +230,57 @@ class StockDataProvider:
     if not clean_symbol:
       raise ValueError("Symbol must be a non-empty string.")
 
+    cached = self._cached_quote(clean_symbol)
+    if cached is not None:
+      return cached
+
+    with self._quote_lock:
+      pending = self._inflight.get(clean_symbol)
+      if pending is None:
+        pending = self._inflight[clean_symbol] = Future()
+        owner = True
+      else:
+        owner = False
+    if not owner:
+      log_server(f"Waiting on the in-flight lookup for {clean_symbol}.")
+      return pending.result()
+
+    try:
+      price = self._resolve_price(clean_symbol)
+    except BaseException as exc:
+      pending.set_exception(exc)
+      raise
+    else:
+      pending.set_result(price)
+      return price
+    finally:
+      with self._quote_lock:
+        del self._inflight[clean_symbol]
+
+  def _resolve_price(self, clean_symbol: str) -> StockPrice:
+    """
+    Look ``clean_symbol`` up live, then in the CSV, and cache the result.
+
+    Parameters
+    ----------
+    clean_symbol : str
+        Normalised ticker symbol.
+
+    Returns
+    -------
+    StockPrice
+        Structured price data originating from either Yahoo Finance or the fallback CSV.
+
+    Raises
+    ------
+    ValueError
+        Raised when neither source knows the symbol.
+    """
     # Try live market data first to prioritise fresh quotes.
     live_price = self._fetch_live_price(clean_symbol)
     if live_price is not None:
       log_server(f"Using live price for {clean_symbol} via yfinance.")
-      return StockPrice(clean_symbol, live_price, "yfinance")
+      return self._remember_quote(StockPrice(clean_symbol, live_price, "yfinance"))
 
     # Fallback to deterministic CSV data to keep workshops runnable offline.
     fallback_price = self._fallback_prices.get(clean_symbol)
@@ -140,7 +288,8 @@ class StockDataProvider:
       raise ValueError(f"Price not available for symbol {clean_symbol}.")
 
     log_server(f"Using CSV fallback for {clean_symbol}.")
-    return StockPrice(clean_symbol, fallback_price, "fallback_csv")
+    # Caching the fallback too spares an offline session the failing live attempt on every repeat.
+    return self._remember_quote(StockPrice(clean_symbol, fallback_price, "fallback_csv"))
 
   def compare_stocks(self, symbol_one: str, symbol_two: str) -> Dict[str, Dict[str, str]]:
     """
@@ -164,8 +313,22 @@ class StockDataProvider:
         Propagated from :meth:`get_stock_price` if either symbol cannot be resolved.
     """
     # Resolve both symbols through the same provider pipeline for consistency.
-    price_one = self.get_stock_price(symbol_one)
-    price_two = self.get_stock_price(symbol_two)
+    # A repeated symbol (usually a routing slip) does not need a second lookup.
+    if symbol_two.strip().upper() == symbol_one.strip().upper():
+      price_one = price_two = self.get_stock_price(symbol_one)
+    elif self.live_enabled:
+      # Two independent network lookups: fetch the second on the side pool while this thread fetches the first.
+      second = self._lookup_executor().submit(self.get_stock_price, symbol_two)
+      try:
+        price_one = self.get_stock_price(symbol_one)
+      except Exception:
+        # Let the side lookup finish so it does not outlive the call, then report the first failure.
+        wait([second])
+        raise
+      price_two = second.result()
+    else:
+      price_one = self.get_stock_price(symbol_one)
+      price_two = self.get_stock_price(symbol_two)
 
     # Build a human-readable comparison summary.
     if price_one.price > price_two.price:
@@ -190,6 +353,67 @@ class StockDataProvider:
       "summary": summary,
     }
 
+  def _lookup_executor(self) -> ThreadPoolExecutor:
+    """
+    Return the side pool used to overlap the two lookups of a comparison.
+
+    Returns
+    -------
+    ThreadPoolExecutor
+        A pool separate from the server's, so a comparison never waits on its own workers.
+    """
+    with self._quote_lock:
+      if self._lookup_pool is None:
+        self._lookup_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="stock-lookup")
+      return self._lookup_pool
+
+  def _cached_quote(self, symbol: str) -> Optional[StockPrice]:
+    """
+    Return a still-fresh cached price for ``symbol``, dropping it if expired.
+
+    Parameters
+    ----------
+    symbol : str
+        Normalised ticker symbol.
+
+    Returns
+    -------
+    Optional[StockPrice]
+        Cached price, or ``None`` on a miss.
+    """
+    with self._quote_lock:
+      entry = self._quote_cache.get(symbol)
+      if entry is None:
+        return None
+      expiry, price = entry
+      if time.monotonic() >= expiry:
+        del self._quote_cache[symbol]
+        return None
+      self._quote_cache.move_to_end(symbol)
+    log_server(f"Using cached {price.source} price for {symbol}.")
+    return price
+
+  def _remember_quote(self, price: StockPrice) -> StockPrice:
+    """
+    Cache ``price`` for ``QUOTE_TTL_SECONDS``, evicting the least recently used symbol when full.
+
+    Parameters
+    ----------
+    price : StockPrice
+        Freshly resolved price.
+
+    Returns
+    -------
+    StockPrice
+        The same ``price``, for chaining.
+    """
+    with self._quote_lock:
+      self._quote_cache[price.symbol] = (time.monotonic() + self.QUOTE_TTL_SECONDS, price)
+      self._quote_cache.move_to_end(price.symbol)
+      if len(self._quote_cache) > self.QUOTE_CACHE_SIZE:
+        self._quote_cache.popitem(last=False)
+    return price
+
   def _fetch_live_price(self, symbol: str) -> Optional[float]:
     """
     Attempt to request the most recent price from Yahoo Finance.
@@ -206,8 +430,12 @@ class StockDataProvider:
 
     Notes
     -----
-    Returns ``None`` immediately when :mod:`yfinance` is not installed.
+    Returns ``None`` immediately when :mod:`yfinance` is not installed; the
+    first call pays for importing it (see :func:`load_yfinance`). The
+    minute-bar history fallback is skipped for ``HISTORY_RETRY_SECONDS`` after
+    it last came back empty for ``symbol``.
     """
+    yf = load_yfinance()
     if yf is None:
       return None
     try:
@@ -219,15 +447,26 @@ class StockDataProvider:
         if live_price:
           return float(live_price)
 
+      # A whole minute-bar frame is the expensive branch; do not refetch one that just came back empty.
+      # Comparisons look symbols up on the side pool, so the back-off shares the quote lock.
+      with self._quote_lock:
+        retry_at = self._history_retry_at.get(symbol, 0.0)
+      if time.monotonic() < retry_at:
+        return None
       # Fall back to recent intraday history if fast_info is missing or empty.
       history = ticker.history(period="1d", interval="1m")
-      if not history.empty:
-        return float(history["Close"].iloc[-1])
+      if history.empty:
+        with self._quote_lock:
+          self._history_retry_at[symbol] = time.monotonic() + self.HISTORY_RETRY_SECONDS
+        return None
+      with self._quote_lock:
+        self._history_retry_at.pop(symbol, None)
+      return float(history["Close"].iloc[-1])
     except Exception:
       return None
     return None
 
-  def _load_csv(self, path: Path) -> Dict[str, float]:
+  def _load_csv(self, path: Path) -> Mapping[str, float]:
     """
     Populate the fallback price dictionary.
 
@@ -238,40 +477,66 @@ class StockDataProvider:
 
     Returns
     -------
-    Dict[str, float]
-        Mapping with upper-case symbols as keys and numeric prices as values.
-    """
-    if not path.exists():
-      return {}
-
-    fallback: Dict[str, float] = {}
-    with path.open("r", encoding="utf-8") as csv_file:
-      for index, line in enumerate(csv_file):
-        if index == 0:
-          # Skip the header row when present.
-          continue
-        parts = [value.strip() for value in line.split(",")]
-        if len(parts) < 2:
-          # Ignore malformed rows rather than failing the entire load.
-          continue
-        symbol, price_str = parts[0], parts[1]
-        try:
-          fallback[symbol.upper()] = float(price_str)
-        except ValueError:
-          # Leave bad numeric values out of the fallback cache.
-          continue
-    return fallback
+    Mapping[str, float]
+        Read-only mapping with upper-case symbols as keys and numeric prices as values.
+    """
+    try:
+      stat = path.stat()
+    except FileNotFoundError:
+      return MappingProxyType({})
+    # Keyed on the file's identity and version, so providers in one process share a parse until the CSV changes.
+    return parse_fallback_csv(str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=8)
+def parse_fallback_csv(path: str, mtime_ns: int, size: int) -> Mapping[str, float]:
+  """
+  Parse a ``symbol,price`` CSV once per file version.
+
+  Parameters
+  ----------
+  path : str
+      Resolved CSV path.
+  mtime_ns : int
+      Modification time in nanoseconds; part of the cache key only.
+  size : int
+      File size in bytes; part of the cache key only.
+
+  Returns
+  -------
+  Mapping[str, float]
+      Read-only mapping with upper-case symbols as keys and numeric prices as values.
+  """
+  fallback: Dict[str, float] = {}
+  with open(path, "r", encoding="utf-8", newline="") as csv_file:
+    # The C-implemented csv reader splits rows; skipinitialspace drops padding after commas.
+    rows = csv.reader(csv_file, skipinitialspace=True)
+    # Skip the header row when present.
+    next(rows, None)
+    for row in rows:
+      if len(row) < 2:
+        # Ignore malformed rows rather than failing the entire load.
+        continue
+      try:
+        # float() tolerates surrounding whitespace, so only the symbol needs stripping.
+        fallback[row[0].strip().upper()] = float(row[1])
+      except ValueError:
+        # Leave bad numeric values out of the fallback cache.
+        continue
+  # Shared between providers, so hand out a read-only view.
+  return MappingProxyType(fallback)
 
 
 class StockToolServer:
   """
   Minimal stdio-based tool server.
 
-  Every request is expected to be a single JSON object on its own line. The
-  response mirrors the request ``id`` so the client can correlate the result.
+  Every request is expected to be a single length-prefixed JSON frame. Tool
+  calls run on a small thread pool, so responses may arrive out of order; each
+  mirrors the request ``id`` so the client can correlate the result.
   """
 
-  def __init__(self, provider: StockDataProvider) -> None:
+  def __init__(self, provider: StockDataProvider, max_workers: int = 4) -> None:
     """
     Store the provider for subsequent tool invocations.
 
@@ -279,43 +544,93 @@ class StockToolServer:
     ----------
     provider : StockDataProvider
         Concrete provider used to fulfil stock price requests.
+    max_workers : int, optional
+        Number of tool calls executed concurrently. Defaults to ``4``.
     """
     # The shared provider encapsulates live/CSV resolution logic.
     self.provider = provider
+    self.max_workers = max_workers
+    # Destination for response frames; bound by run().
+    self._output: BinaryIO = sys.stdout.buffer
+    # Serialises frames written to ``_output`` from worker threads.
+    self._output_lock = threading.Lock()
 
-  def run(self, input_stream: Iterable[str] = sys.stdin) -> None:
+  def run(self, input_stream: Optional[BinaryIO] = None, output_stream: Optional[BinaryIO] = None) -> None:
     """
     Consume requests from an input stream and publish JSON responses.
 
     Parameters
     ----------
-    input_stream : Iterable[str], optional
-        Source of newline-delimited JSON. Defaults to ``sys.stdin``.
+    input_stream : BinaryIO, optional
+        Source of length-prefixed JSON frames. Defaults to stdin, re-buffered to ``PIPE_BUFFER_SIZE``.
+    output_stream : BinaryIO, optional
+        Destination for response frames. Defaults to stdout, block-buffered to ``PIPE_BUFFER_SIZE``.
     """
+    if input_stream is None:
+      # sys.stdin.buffer only buffers 8 KiB; read the pipe in larger chunks.
+      input_stream = open(sys.stdin.fileno(), "rb", buffering=PIPE_BUFFER_SIZE, closefd=False)
+    if output_stream is None:
+      # Under ``python -u`` sys.stdout.buffer is a raw FileIO whose write() may be partial;
+      # a block buffer takes each frame whole and write_frame flushes it once.
+      output_stream = open(sys.stdout.fileno(), "wb", buffering=PIPE_BUFFER_SIZE, closefd=False)
+    self._output = output_stream
     # Emit a ready signal so clients can block until the server is listening.
     log_server("Starting raw stdio MCP server and sending readiness signal.")
-    ready_message = {"type": "ready", "version": "1.0"}
-    print(json.dumps(ready_message), flush=True)
+    # ``batch`` advertises support for several tool calls in one request frame.
+    ready_message = {"type": "ready", "version": "1.0", "batch": True}
+    with self._output_lock:
+      write_magic(self._output)
+      write_frame(self._output, ready_message)
 
-    # Main request loop: parse, validate, execute, and respond.
-    for line in input_stream:
-      line = line.strip()
-      if not line:
-        continue
+    # Main request loop: parse and validate here, execute and respond on the pool.
+    with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stock-tool") as executor:
+      self._serve(input_stream, executor)
+
+  def _serve(self, input_stream: BinaryIO, executor: ThreadPoolExecutor) -> None:
+    """
+    Read frames until shutdown or end of input, dispatching tool calls to ``executor``.
 
+    Parameters
+    ----------
+    input_stream : BinaryIO
+        Source of length-prefixed JSON frames.
+    executor : ThreadPoolExecutor
+        Pool that runs tool invocations.
+    """
+    # One body buffer for the whole session; read_frame grows it to the largest request.
+    read_buffer = bytearray(PIPE_BUFFER_SIZE)
+    while True:
       try:
-        payload = json.loads(line)
+        payload = read_frame(input_stream, read_buffer)
       except json.JSONDecodeError:
+        # The frame length was honoured, so the stream is still in sync.
         log_server("Rejecting payload: invalid JSON.")
         self._emit_error("unknown", "Invalid JSON payload.")
         continue
+      except ValueError as exc:
+        # A bad header leaves no way to find the next frame boundary.
+        log_server(f"Rejecting stream: {exc}")
+        self._emit_error("unknown", "Invalid frame.")
+        break
+      if payload is None:
+        break
+      if not isinstance(payload, dict):
+        log_server("Rejecting payload: expected a JSON object.")
+        self._emit_error("unknown", "Invalid JSON payload.")
+        continue
 
       message_type = payload.get("type")
       if message_type == "shutdown":
         log_server(f"Shutdown requested by client (id={payload.get('id')}).")
+        # Let in-flight tool calls answer before acknowledging.
+        executor.shutdown(wait=True)
         self._emit_response(payload.get("id", "unknown"), {"status": "shutting_down"})
         break
 
+      if message_type == "batch":
+        self._dispatch_batch(payload.get("id"), payload.get("calls"), executor)
+        continue
+
       if message_type != "invoke":
         log_server(
           f"Unsupported message type '{message_type}' received; id={payload.get('id', 'unknown')}.",
@@ -330,18 +645,81 @@ class StockToolServer:
       log_server(
         f"Executing tool '{tool_name}' for request {request_id} with arguments {arguments}.",
       )
+      executor.submit(self._handle_invoke, request_id, tool_name, arguments)
+
+  def _dispatch_batch(
+    self,
+    request_id: Optional[Union[int, str]],
+    calls: object,
+    executor: ThreadPoolExecutor,
+  ) -> None:
+    """
+    Run every call of a batch on the pool and answer once with a parallel list of outcomes.
 
+    Parameters
+    ----------
+    request_id : Optional[Union[int, str]]
+        Identifier echoed from the batch request.
+    calls : object
+        Expected to be a list of ``{"tool": ..., "arguments": ...}`` objects.
+    executor : ThreadPoolExecutor
+        Pool that runs the individual tool invocations.
+    """
+    if not isinstance(calls, list) or not all(isinstance(call, dict) for call in calls):
+      self._emit_error(request_id, "Batch calls must be a list of objects.")
+      return
+    log_server(f"Executing batch {request_id} with {len(calls)} calls.")
+    outcomes: list = [None] * len(calls)
+    remaining = [len(calls)]
+    lock = threading.Lock()
+
+    def _run(index: int, call: Dict[str, object]) -> None:
       try:
-        result = self._invoke_tool(tool_name, arguments)
-        log_server(
-          f"Tool '{tool_name}' completed for request {request_id}; result keys={list(result.keys())}.",
-        )
-        self._emit_response(request_id, result)
+        outcomes[index] = {"result": self._invoke_tool(call.get("tool"), call.get("arguments") or {})}
       except Exception as exc:  # pylint: disable=broad-except
-        log_server(f"Error while executing request {request_id}: {exc}")
-        self._emit_error(request_id, str(exc))
+        outcomes[index] = {"error": str(exc)}
+      with lock:
+        remaining[0] -= 1
+        done = remaining[0] == 0
+      if done:
+        self._emit_response(request_id, outcomes)
+
+    if not calls:
+      self._emit_response(request_id, [])
+      return
+    for index, call in enumerate(calls):
+      executor.submit(_run, index, call)
+
+  def _handle_invoke(self, request_id: Optional[Union[int, str]], tool_name: str, arguments: Dict[str, object]) -> None:
+    """
+    Run one tool call and emit its response or error.
+
+    Parameters
+    ----------
+    request_id : Optional[Union[int, str]]
+        Identifier echoed from the original request.
+    tool_name : str
+        Name of the requested tool.
+    arguments : Dict[str, object]
+        Payload containing tool-specific parameters.
+    """
+    try:
+      if tool_name == "get_stock_price":
+        # The most common response has a fixed shape, so it is spliced from preformatted bytes.
+        price = self.provider.get_stock_price(str(arguments.get("symbol", "")))
+        log_server(f"Tool '{tool_name}' completed for request {request_id}; result keys=['data'].")
+        self._emit_price(request_id, price)
+        return
+      result = self._invoke_tool(tool_name, arguments)
+      log_server(
+        f"Tool '{tool_name}' completed for request {request_id}; result keys={list(result.keys())}.",
+      )
+      self._emit_response(request_id, result)
+    except Exception as exc:  # pylint: disable=broad-except
+      log_server(f"Error while executing request {request_id}: {exc}")
+      self._emit_error(request_id, str(exc))
 
-  def _invoke_tool(self, tool_name: str, arguments: Dict[str, str]) -> Dict[str, object]:
+  def _invoke_tool(self, tool_name: str, arguments: Dict[str, object]) -> Dict[str, object]:
     """
     Dispatch a tool request to the provider.
 
@@ -349,7 +727,7 @@ class StockToolServer:
     ----------
     tool_name : str
         Name of the requested tool.
-    arguments : Dict[str, str]
+    arguments : Dict[str, object]
         Payload containing tool-specific parameters.
 
     Returns
@@ -363,50 +741,69 @@ class StockToolServer:
         Raised when the tool name is unknown.
     """
     # Directly dispatch to the correct provider method based on the tool name.
+    # Routers pass JSON values through untouched, so symbols are coerced to text here.
     if tool_name == "get_stock_price":
-      symbol = arguments.get("symbol", "")
+      symbol = str(arguments.get("symbol", ""))
       price = self.provider.get_stock_price(symbol)
       return {"data": price.as_dict()}
 
     if tool_name == "compare_stocks":
-      symbol_one = arguments.get("symbol_one", "")
-      symbol_two = arguments.get("symbol_two", "")
+      symbol_one = str(arguments.get("symbol_one", ""))
+      symbol_two = str(arguments.get("symbol_two", ""))
       comparison = self.provider.compare_stocks(symbol_one, symbol_two)
       return {"data": comparison}
 
     raise ValueError(f"Unknown tool '{tool_name}'.")
 
-  @staticmethod
-  def _emit_response(request_id: Optional[str], result: Dict[str, object]) -> None:
+  def _emit_response(self, request_id: Optional[Union[int, str]], result: Union[Dict[str, object], list]) -> None:
     """
     Write a successful response to stdout.
 
     Parameters
     ----------
-    request_id : Optional[str]
+    request_id : Optional[Union[int, str]]
         Identifier echoed from the original request.
-    result : Dict[str, object]
-        Result payload returned by the invoked tool.
+    result : Union[Dict[str, object], list]
+        Result payload returned by the invoked tool, or one outcome per call for a batch.
     """
-    # The client expects newline-delimited JSON with a matching request id.
+    # The client expects a length-prefixed JSON frame with a matching request id.
     payload = {"type": "response", "id": request_id, "result": result}
-    print(json.dumps(payload), flush=True)
+    with self._output_lock:
+      write_frame(self._output, payload)
+
+  def _emit_price(self, request_id: Optional[Union[int, str]], price: StockPrice) -> None:
+    """
+    Write a ``get_stock_price`` response without encoding an intermediate dictionary.
 
-  @staticmethod
-  def _emit_error(request_id: Optional[str], message: str) -> None:
+    Parameters
+    ----------
+    request_id : Optional[Union[int, str]]
+        Identifier echoed from the original request.
+    price : StockPrice
+        Resolved quote; framed exactly as ``{"data": price.as_dict()}`` would be.
+    """
+    body = b'{"type":"response","id":%b,"result":{"data":%b}}' % (
+      fastjson.dumps(request_id),
+      price.as_json_bytes(),
+    )
+    with self._output_lock:
+      write_frame_bytes(self._output, body)
+
+  def _emit_error(self, request_id: Optional[Union[int, str]], message: str) -> None:
     """
     Write an error payload to stdout.
 
     Parameters
     ----------
-    request_id : Optional[str]
+    request_id : Optional[Union[int, str]]
         Identifier echoed from the original request.
     message : str
         Human-readable error message.
     """
     # Use the same envelope shape as successful responses to simplify clients.
     payload = {"type": "response", "id": request_id, "error": message}
-    print(json.dumps(payload), flush=True)
+    with self._output_lock:
+      write_frame(self._output, payload)
 
 
 def main() -> None:
@@ -13,10 +13,16 @@ python tests/run_tests.py course
 from __future__ import annotations
 
 import asyncio
+import io
 import os
+import socket
 import sys
+import tempfile
+import threading
+import time
 import unittest
 from pathlib import Path
+from unittest import mock
 from typing import Dict, Literal, Tuple, Type
 
 from dotenv import load_dotenv
@@ -61,7 +67,9 @@ def load_variant_modules(
     try:
       from course_version.client import GeminiRouter as DeepseekRouter  # type: ignore
       from course_version.client import CourseMCPClient as StockToolClient  # type: ignore
-      from course_version.client import ToolCall, render_result  # type: ignore
+      from course_version.client import ToolCall  # type: ignore
+      # The course client prints tool text directly; the shared helper covers the render test.
+      from utils.utils import render_result
     except ImportError as exc:
       print("course variant dependencies not available; skipping.")
       sys.exit(0)
@@ -96,6 +104,166 @@ class StockDataProviderTest(unittest.TestCase):
     self.assertIn("AAPL", comparison["summary"])
     self.assertIn("MSFT", comparison["summary"])
 
+  def test_concurrent_lookups_share_one_fetch(self) -> None:
+    """Callers arriving while a symbol is being fetched wait for that fetch instead of starting their own."""
+    from raw_version import server
+
+    started, release = threading.Event(), threading.Event()
+    fetches = []
+
+    def _slow_fetch(symbol: str) -> float:
+      fetches.append(symbol)
+      started.set()
+      release.wait(5)
+      return 123.0
+
+    self.provider._fetch_live_price = _slow_fetch  # type: ignore[method-assign]
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(self.provider.get_stock_price("aapl"))) for _ in range(4)]
+    with mock.patch.object(server, "log_server") as log:
+      threads[0].start()
+      self.assertTrue(started.wait(5))
+      for thread in threads[1:]:
+        thread.start()
+      # Waiters announce themselves just before blocking on the shared lookup.
+      deadline = time.monotonic() + 5
+      while sum("in-flight" in call.args[0] for call in log.call_args_list) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+      release.set()
+      for thread in threads:
+        thread.join(5)
+    self.assertEqual(fetches, ["AAPL"])
+    self.assertEqual([price.price for price in results], [123.0] * 4)
+
+  def test_quote_cache_expires(self) -> None:
+    """A resolved price is reused until QUOTE_TTL_SECONDS have passed."""
+    fetches = []
+    self.provider._fetch_live_price = lambda symbol: fetches.append(symbol) or 100.0  # type: ignore[method-assign]
+    with mock.patch("raw_version.server.time.monotonic", return_value=1000.0) as clock:
+      self.provider.get_stock_price("AAPL")
+      self.provider.get_stock_price("AAPL")
+      self.assertEqual(len(fetches), 1)
+      clock.return_value += self.provider.QUOTE_TTL_SECONDS
+      self.provider.get_stock_price("AAPL")
+    self.assertEqual(len(fetches), 2)
+
+  def test_empty_history_is_not_retried_within_backoff(self) -> None:
+    """An empty intraday history is not requested again until HISTORY_RETRY_SECONDS have passed."""
+    ticker = mock.Mock(fast_info=None)
+    ticker.history.return_value = mock.Mock(empty=True)
+    yfinance_stub = mock.Mock()
+    yfinance_stub.Ticker.return_value = ticker
+    with mock.patch("raw_version.server.load_yfinance", return_value=yfinance_stub), \
+         mock.patch("raw_version.server.time.monotonic", return_value=1000.0) as clock:
+      self.assertIsNone(self.provider._fetch_live_price("AAPL"))
+      clock.return_value += self.provider.HISTORY_RETRY_SECONDS - 1
+      self.assertIsNone(self.provider._fetch_live_price("AAPL"))
+      self.assertEqual(ticker.history.call_count, 1)
+      clock.return_value += 1
+      self.assertIsNone(self.provider._fetch_live_price("AAPL"))
+    self.assertEqual(ticker.history.call_count, 2)
+
+  def test_empty_history_falls_back_to_csv_once(self) -> None:
+    """Without fast_info and with an empty history, lookups answer from the CSV and skip the repeat history call."""
+    ticker = mock.Mock(fast_info=None)
+    ticker.history.return_value = mock.Mock(empty=True)
+    yfinance_stub = mock.Mock()
+    yfinance_stub.Ticker.return_value = ticker
+    with mock.patch("raw_version.server.load_yfinance", return_value=yfinance_stub), \
+         mock.patch("raw_version.server.time.monotonic", return_value=1000.0) as clock:
+      first = self.provider.get_stock_price("AAPL")
+      # Past the quote TTL but inside the history back-off, the lookup reaches yfinance again.
+      clock.return_value += self.provider.QUOTE_TTL_SECONDS
+      second = self.provider.get_stock_price("AAPL")
+    self.assertEqual((first.source, second.source), ("fallback_csv", "fallback_csv"))
+    self.assertEqual(yfinance_stub.Ticker.call_count, 2)
+    self.assertEqual(ticker.history.call_count, 1)
+
+
+class FramingTest(unittest.TestCase):
+  """Check the length-prefixed framing used by the raw stdio protocol."""
+
+  def test_round_trip_reuses_buffer(self) -> None:
+    """Frames of different sizes decode in order through one shared buffer."""
+    from utils.framing import read_frame, write_frame
+
+    stream = io.BytesIO()
+    payloads = [{"id": 1, "name": "x" * 100}, {"id": 2}, {"id": 3, "rows": list(range(50))}]
+    for payload in payloads:
+      write_frame(stream, payload)
+    stream.seek(0)
+    buffer = bytearray()
+    self.assertEqual([read_frame(stream, buffer) for _ in payloads], payloads)
+    self.assertIsNone(read_frame(stream, buffer))
+
+  def test_truncated_header(self) -> None:
+    """A stream ending inside the length prefix is rejected."""
+    from utils.framing import read_frame
+
+    with self.assertRaises(ValueError):
+      read_frame(io.BytesIO(b"\x00\x00"))
+
+  def test_truncated_body(self) -> None:
+    """A stream ending before the announced body length is rejected, with or without a buffer."""
+    from utils.framing import FRAME_HEADER, read_frame
+
+    data = FRAME_HEADER.pack(10) + b'{"a":'
+    with self.assertRaises(ValueError):
+      read_frame(io.BytesIO(data))
+    with self.assertRaises(ValueError):
+      read_frame(io.BytesIO(data), bytearray())
+
+  def test_oversize_header(self) -> None:
+    """A length above the frame limit is treated as a corrupt header."""
+    from utils.framing import FRAME_HEADER, MAX_FRAME_SIZE, read_frame
+
+    with self.assertRaises(ValueError):
+      read_frame(io.BytesIO(FRAME_HEADER.pack(MAX_FRAME_SIZE + 1)))
+
+  def test_expect_magic(self) -> None:
+    """The handshake accepts the current magic and rejects any other prefix."""
+    from utils.framing import FRAME_MAGIC, expect_magic, write_magic
+
+    stream = io.BytesIO()
+    write_magic(stream)
+    stream.seek(0)
+    expect_magic(stream)
+    with self.assertRaises(ValueError):
+      expect_magic(io.BytesIO(b"SFR\x01" + FRAME_MAGIC))
+
+
+class AsyncLineReaderTest(unittest.TestCase):
+  """Check the shared asyncio stdin reader used by the REPLs."""
+
+  def test_reads_pipe_lines_then_eof(self) -> None:
+    """Lines from a pipe arrive without newlines, then end of input raises EOFError."""
+    from utils.async_input import AsyncLineReader
+
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, b"first\r\nsecond")
+    os.close(write_fd)
+
+    async def _read_all() -> list:
+      lines = []
+      with open(read_fd, "r", encoding="utf-8") as stream, AsyncLineReader(stream, io.StringIO()) as reader:
+        with self.assertRaises(EOFError):
+          while True:
+            lines.append(await reader.readline("> "))
+      return lines
+
+    self.assertEqual(asyncio.run(_read_all()), ["first", "second"])
+
+  def test_missing_stdin_reads_as_eof(self) -> None:
+    """Without a stdin (pythonw, detached services) reading ends the session instead of failing."""
+    from utils.async_input import AsyncLineReader
+
+    async def _read() -> None:
+      with AsyncLineReader(output=io.StringIO(), line_editing=True) as reader:
+        await reader.readline("> ")
+
+    with mock.patch.object(sys, "stdin", None), self.assertRaises(EOFError):
+      asyncio.run(_read())
+
 
 class DeepseekRouterTest(unittest.TestCase):
   """Exercise heuristic routing when the AI router is unavailable."""
@@ -117,32 +285,269 @@ class DeepseekRouterTest(unittest.TestCase):
     self.assertEqual(tool_call.arguments["symbol_one"], "AAPL")
     self.assertEqual(tool_call.arguments["symbol_two"], "MSFT")
 
+  def test_unambiguous_prompt_skips_model(self) -> None:
+    """With a key configured, prompts naming known symbols are resolved locally."""
+    router = DeepseekRouter(api_key="unused-key", debug=False)  # type: ignore[call-arg]
+    tool_call = router.route("Compare Apple vs MSFT")
+    self.assertEqual(tool_call.source, "regex")
+    self.assertEqual(tool_call.arguments, {"symbol_one": "AAPL", "symbol_two": "MSFT"})
+
+  def test_repeated_prompt_uses_cache(self) -> None:
+    """A model decision is reused for the same prompt modulo case and spacing."""
+    router = DeepseekRouter(api_key="unused-key", debug=False)  # type: ignore[call-arg]
+    decision = ToolCall("get_stock_price", {"symbol": "AAPL"}, source="model")
+    with mock.patch.object(router, "_deepseek_route", return_value=decision) as model:
+      router.route("How is the fruit company doing?")
+      tool_call = router.route("  how is the fruit  company doing? ")
+    self.assertEqual(model.call_count, 1)
+    self.assertEqual(tool_call.source, "model-cache")
+    self.assertEqual(tool_call.arguments, {"symbol": "AAPL"})
+
+  def test_cached_route_survives_caller_mutation(self) -> None:
+    """Changing the arguments of a routed call does not leak into later cache hits."""
+    router = DeepseekRouter(api_key="unused-key", debug=False)  # type: ignore[call-arg]
+    decision = ToolCall("get_stock_price", {"symbol": "AAPL"}, source="model")
+    with mock.patch.object(router, "_deepseek_route", return_value=decision):
+      first = router.route("How is the fruit company doing?")
+      first.arguments["symbol"] = "HACK"
+      second = router.route("How is the fruit company doing?")
+      second.arguments["symbol"] = "HACK"
+      third = router.route("How is the fruit company doing?")
+    self.assertEqual(third.source, "model-cache")
+    self.assertEqual(third.arguments, {"symbol": "AAPL"})
+
+  def test_cache_keeps_comparison_order(self) -> None:
+    """Prompts naming the same symbols in a different order do not share a cached decision."""
+    router = DeepseekRouter(api_key="unused-key", debug=False)  # type: ignore[call-arg]
+    decisions = [
+      ToolCall("compare_stocks", {"symbol_one": "OIL1", "symbol_two": "OIL2"}, source="model"),
+      ToolCall("compare_stocks", {"symbol_one": "OIL2", "symbol_two": "OIL1"}, source="model"),
+    ]
+    with mock.patch.object(router, "_deepseek_route", side_effect=decisions) as model:
+      router.route("Is the oil1 fund above oil2?")
+      tool_call = router.route("Is the oil2 fund above oil1?")
+    self.assertEqual(model.call_count, 2)
+    self.assertEqual(tool_call.arguments, {"symbol_one": "OIL2", "symbol_two": "OIL1"})
+
+  def test_route_many_keeps_order_and_shares_repeats(self) -> None:
+    """Batched routing returns one call per prompt in order, asking the model once per distinct prompt."""
+    router = DeepseekRouter(api_key="unused-key", debug=False)  # type: ignore[call-arg]
+    decision = ToolCall("get_stock_price", {"symbol": "AAPL"}, source="model")
+    prompts = ["How is the fruit company doing?", "Compare Apple vs MSFT", " How is the fruit company doing? "]
+    with mock.patch.object(router, "_deepseek_route_async", new=mock.AsyncMock(return_value=decision)) as model:
+      tool_calls = asyncio.run(router.aroute_many(prompts))
+    self.assertEqual(model.call_count, 1)
+    self.assertEqual([call.name for call in tool_calls], ["get_stock_price", "compare_stocks", "get_stock_price"])
+    self.assertIsNot(tool_calls[0].arguments, tool_calls[2].arguments)
+
+
+class CourseReplyParsingTest(unittest.TestCase):
+  """Check how the course router reads Gemini tool-identification replies."""
+
+  def setUp(self) -> None:
+    if VARIANT != "course":
+      self.skipTest("Gemini reply parsing is specific to the course client.")
+
+  def test_bare_key_example_format(self) -> None:
+    """The prompt's own example, with bare keys and no commas, is salvaged."""
+    from course_version.client import parse_tool_reply
+
+    raw = """```json
+{
+    user_query: "What is the weather in Bengaluru?"
+    tool_identified: "get_weather"
+    arguments: {"location":"BLR"}
+}
+```"""
+    self.assertEqual(parse_tool_reply(raw), {"tool_identified": "get_weather", "arguments": {"location": "BLR"}})
+
+  def test_string_arguments(self) -> None:
+    """An ``"arg1, arg2"`` string becomes a one-item dict, from valid JSON or bare keys."""
+    from course_version.client import parse_tool_reply
+
+    valid = '{"user_query": "q", "tool_identified": "get_stock_price", "arguments": "symbol, AAPL"}'
+    self.assertEqual(parse_tool_reply(valid)["arguments"], {"symbol": "AAPL"})
+    bare = 'tool_identified: "get_stock_price"\narguments: "symbol, AAPL"'
+    self.assertEqual(parse_tool_reply(bare)["arguments"], {"symbol": "AAPL"})
+
+  def test_unclosed_arguments(self) -> None:
+    """An arguments object that never closes is rejected."""
+    from course_version.client import extract_tool_fields
+
+    with self.assertRaises(ValueError):
+      extract_tool_fields('tool_identified: "get_stock_price"\narguments: {"symbol": "AAPL"')
+
+  def test_braces_inside_strings(self) -> None:
+    """Braces and escaped quotes inside argument strings do not end the object early."""
+    from course_version.client import extract_tool_fields
+
+    raw = 'tool_identified: "get_stock_price"\narguments: {"symbol": "A}\\"{B"}\n}'
+    self.assertEqual(extract_tool_fields(raw)["arguments"], {"symbol": 'A}"{B'})
+
+  def test_stream_stops_after_object_closes(self) -> None:
+    """Streaming reads past braces echoed inside strings and stops once the object closes."""
+    from course_version.client import GeminiRouter
+
+    chunks = ['{"user_query": "is {IBM}} up?", ', '"tool_identified": "get_stock_price", ', '"arguments": {"symbol": "IBM"}}', "trailing"]
+    consumed = []
+
+    def _generate(**_kwargs: object):
+      for text in chunks:
+        consumed.append(text)
+        yield mock.Mock(text=text)
+
+    router = GeminiRouter(api_key=None, debug=False)
+    router._client = mock.Mock()
+    router._client.models.generate_content_stream.side_effect = _generate
+    self.assertEqual(router._stream_reply("prompt"), "".join(chunks[:3]))
+    self.assertEqual(consumed, chunks[:3])
+
 
 class StockToolClientIntegrationTest(unittest.TestCase):
-  """Launch the selected server process and perform round-trip checks."""
+  """Launch the selected server process once and perform round-trip checks against it."""
 
-  def setUp(self) -> None:
+  @classmethod
+  def setUpClass(cls) -> None:
     load_dotenv()
+    if VARIANT == "raw":
+      cls._router = DeepseekRouter(api_key=None)  # type: ignore[call-arg]
+      cls._client = StockToolClient(server_path=SERVER_PATH, router=cls._router)  # type: ignore[call-arg]
+      cls._client.__enter__()
+      return
+    # Async clients must be entered and exited by one task on one loop, so a holder task
+    # keeps the client open on a class-level loop until tearDownClass releases it.
+    cls._loop = asyncio.new_event_loop()
+    cls._client = StockToolClient(server_path=SERVER_PATH, debug=True)  # type: ignore[call-arg]
+    cls._release = asyncio.Event()
+    ready = asyncio.Event()
+
+    async def _hold() -> None:
+      async with cls._client:
+        ready.set()
+        await cls._release.wait()
+
+    async def _start() -> None:
+      cls._holder = asyncio.create_task(_hold())
+      ready_wait = asyncio.create_task(ready.wait())
+      await asyncio.wait({cls._holder, ready_wait}, return_when=asyncio.FIRST_COMPLETED)
+      ready_wait.cancel()
+      if cls._holder.done():
+        cls._holder.result()  # Re-raise a startup failure.
 
-  def _invoke_price(self) -> Dict[str, str]:
-    router = DeepseekRouter(api_key=None)  # type: ignore[call-arg]
+    try:
+      cls._loop.run_until_complete(_start())
+    except BaseException:
+      cls._loop.close()
+      raise
+
+  @classmethod
+  def tearDownClass(cls) -> None:
     if VARIANT == "raw":
-      with StockToolClient(server_path=SERVER_PATH, router=router) as client:
-        return client.invoke(ToolCall("get_stock_price", {"symbol": "IBM"}))
+      cls._client.__exit__(None, None, None)
+      return
+    try:
+      cls._release.set()
+      cls._loop.run_until_complete(cls._holder)
+    finally:
+      cls._loop.close()
 
-    async def _invoke_async() -> Dict[str, str]:
-      async with StockToolClient(server_path=SERVER_PATH, debug=True) as client:  # type: ignore[arg-type]
-        return await client.invoke(ToolCall("get_stock_price", {"symbol": "IBM"}))
+  def _invoke(self, tool_call: object) -> Dict[str, str]:
+    if VARIANT == "raw":
+      return self._client.invoke(tool_call)
+    return self._loop.run_until_complete(self._client.invoke(tool_call))
 
-    return asyncio.run(_invoke_async())
+  def _invoke_price(self) -> Dict[str, str]:
+    return self._invoke(ToolCall("get_stock_price", {"symbol": "IBM"}))
 
   def test_get_stock_price_round_trip(self) -> None:
     """Client and server should communicate over stdio for price lookups."""
     result = self._invoke_price()
+    if VARIANT == "course":
+      # The course tools answer with prose rather than a ``{"data": ...}`` payload.
+      self.assertIsInstance(result, str)
+      self.assertIn("IBM", result)
+      return
     data: Dict[str, str] = result.get("data") or {}
     self.assertEqual(data.get("symbol"), "IBM")
     self.assertIn("source", data)
 
+  def test_result_cache_hands_out_copies(self) -> None:
+    """Editing a returned payload does not change what later cache hits return."""
+    if VARIANT != "raw":
+      self.skipTest("The result cache is specific to the raw client.")
+    self._client.invalidate()
+    first = self._invoke_price()
+    first["data"]["symbol"] = "HACK"
+    second = self._invoke_price()
+    second["data"]["symbol"] = "HACK"
+    self.assertEqual(self._invoke_price()["data"]["symbol"], "IBM")
+
+  def test_invoke_many_keeps_order(self) -> None:
+    """Batched calls return one result per call in input order, with or without server batching."""
+    if VARIANT != "raw":
+      self.skipTest("Batch requests are specific to the raw protocol.")
+    symbols = ["MSFT", "IBM", "AAPL"]
+    tool_calls = [ToolCall("get_stock_price", {"symbol": symbol}) for symbol in symbols]
+    self.assertTrue(self._client.supports_batch)
+    results = asyncio.run(self._client.ainvoke_many(tool_calls))
+    self.assertEqual([result["data"]["symbol"] for result in results], symbols)
+    with mock.patch.object(self._client, "supports_batch", False):
+      results = self._client.invoke_batch(tool_calls)
+    self.assertEqual([result["data"]["symbol"] for result in results], symbols)
+
+  def test_invoke_many_reports_failed_call(self) -> None:
+    """A failing call in a batch surfaces its own error."""
+    if VARIANT != "raw":
+      self.skipTest("Batch requests are specific to the raw protocol.")
+    tool_calls = [ToolCall("get_stock_price", {"symbol": "IBM"}), ToolCall("no_such_tool", {})]
+    with self.assertRaisesRegex(RuntimeError, "no_such_tool"):
+      asyncio.run(self._client.ainvoke_many(tool_calls))
+
+  @unittest.skipUnless(hasattr(socket, "AF_UNIX"), "Unix domain sockets are POSIX-only.")
+  def test_daemon_socket_round_trip(self) -> None:
+    """A socket client reaches the shared server through one daemon connection."""
+    if VARIANT != "raw":
+      self.skipTest("The daemon socket is specific to the raw client.")
+    from raw_version.client import SocketToolClient, _serve_connection
+
+    with tempfile.TemporaryDirectory() as directory:
+      socket_path = Path(directory) / "daemon.sock"
+      with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+        listener.bind(str(socket_path))
+        listener.listen()
+
+        def _accept_one() -> None:
+          connection, _ = listener.accept()
+          _serve_connection(self._client, connection)
+
+        server_thread = threading.Thread(target=_accept_one, daemon=True)
+        server_thread.start()
+        with SocketToolClient(socket_path, debug=False) as client:
+          result = client.invoke(ToolCall("get_stock_price", {"symbol": "IBM"}))
+          client.invalidate()
+          with self.assertRaisesRegex(RuntimeError, "no_such_tool"):
+            client.invoke(ToolCall("no_such_tool", {}))
+        server_thread.join(timeout=5)
+    self.assertEqual(result["data"]["symbol"], "IBM")
+    self.assertFalse(server_thread.is_alive())
+
+  @unittest.skipUnless(hasattr(socket, "AF_UNIX"), "Unix domain sockets are POSIX-only.")
+  def test_daemon_refuses_live_socket(self) -> None:
+    """Starting a daemon on a socket another daemon answers fails without touching it."""
+    if VARIANT != "raw":
+      self.skipTest("The daemon socket is specific to the raw client.")
+    from raw_version import client as raw_client
+
+    with tempfile.TemporaryDirectory() as directory:
+      socket_path = Path(directory) / "daemon.sock"
+      with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+        listener.bind(str(socket_path))
+        listener.listen()
+        with mock.patch.object(raw_client, "StockToolClient", side_effect=AssertionError("server started")):
+          with self.assertRaisesRegex(RuntimeError, "already listening"):
+            raw_client.serve_daemon(socket_path, debug=False)
+        self.assertTrue(socket_path.is_socket())
+
   def test_render_result_compare(self) -> None:
     """Render helper should convert comparison payloads into strings."""
     payload = {
@@ -8,7 +8,22 @@ import unittest
 from dotenv import load_dotenv
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
+RAW_SERVER_PATH = REPO_ROOT / "raw_version" / "server.py"
+MCP_SERVER_PATH = REPO_ROOT / "mcp_version" / "server.py"
+COURSE_SERVER_PATH = REPO_ROOT / "course_version" / "server.py"
 PROMPT = "What is the price of Tesla?"
+# One event loop for every async end-to-end test instead of a fresh one per asyncio.run().
+_LOOP: asyncio.AbstractEventLoop
+
+
+def setUpModule() -> None:
+  global _LOOP
+  _LOOP = asyncio.new_event_loop()
+
+
+def tearDownModule() -> None:
+  _LOOP.run_until_complete(_LOOP.shutdown_asyncgens())
+  _LOOP.close()
 
 
 class RawEndToEndTest(unittest.TestCase):
@@ -21,8 +36,7 @@ class RawEndToEndTest(unittest.TestCase):
 
     router = DeepseekRouter(api_key=None, debug=False)
     tool_call = router.route(PROMPT)
-    server_path = REPO_ROOT / "raw_version" / "server.py"
-    with StockToolClient(server_path=server_path, router=router, debug=False) as client:
+    with StockToolClient(server_path=RAW_SERVER_PATH, router=router, debug=False) as client:
       result = client.invoke(tool_call)
 
     data = result.get("data") or {}
@@ -41,17 +55,16 @@ class McpEndToEndTest(unittest.TestCase):
 
     router = OpenAIBackedRouter(api_key=None, debug=False)
     tool_call = router.route(PROMPT)
-    server_path = REPO_ROOT / "mcp_version" / "server.py"
 
     async def _runner() -> dict:
       async with MCPStockClient(
-        server_path=server_path,
+        server_path=MCP_SERVER_PATH,
         debug=False,
         force_memory=True,
       ) as client:
         return await client.invoke(tool_call)
 
-    return asyncio.run(_runner())
+    return _LOOP.run_until_complete(_runner())
 
   def test_mcp_version_prompt(self) -> None:
     result = self._invoke()
@@ -72,17 +85,16 @@ class CourseEndToEndTest(unittest.TestCase):
 
     router = GeminiRouter(api_key=None, debug=False)
     tool_call = router.route(PROMPT)
-    server_path = REPO_ROOT / "course_version" / "server.py"
 
     async def _runner() -> str:
       async with CourseMCPClient(
-        server_path=server_path,
+        server_path=COURSE_SERVER_PATH,
         debug=False,
         force_memory=True,
       ) as client:
         return await client.invoke(tool_call)
 
-    return asyncio.run(_runner())
+    return _LOOP.run_until_complete(_runner())
 
   def test_course_version_prompt(self) -> None:
     response_text = self._invoke()
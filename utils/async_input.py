@@ -0,0 +1,165 @@
+"""
+Line-oriented stdin reading for asyncio REPLs.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import queue
+import sys
+import threading
+from collections import deque
+from typing import Deque, Optional, TextIO, Tuple
+
+
+class AsyncLineReader:
+  """
+  Deliver stdin lines to coroutines straight from the event loop's selector.
+
+  ``readline`` mirrors :func:`input`: it writes the prompt, returns the line
+  without its newline and raises :class:`EOFError` at end of input. When stdin
+  cannot be registered with the loop (Windows consoles, regular files), or when
+  ``line_editing`` is requested for a terminal so :mod:`readline` editing and
+  history keep working, one daemon thread running :func:`input` is used instead.
+  A missing stdin (``sys.stdin is None``) reads as end of input.
+  """
+
+  def __init__(
+    self,
+    stream: Optional[TextIO] = None,
+    output: Optional[TextIO] = None,
+    *,
+    line_editing: bool = False,
+  ) -> None:
+    self._stream = stream if stream is not None else sys.stdin
+    self._output = output or sys.stdout
+    self._encoding = getattr(self._stream, "encoding", None) or "utf-8"
+    self._loop = asyncio.get_running_loop()
+    self._buffer = bytearray()
+    self._waiters: Deque[asyncio.Future] = deque()
+    self._eof = self._stream is None
+    self._fd: Optional[int] = None
+    # (prompt, waiter) pairs for the input() thread; ``None`` stops it.
+    self._requests: Optional["queue.SimpleQueue[Optional[Tuple[str, asyncio.Future]]]"] = None
+    # input() renders the prompt itself, which readline needs to redraw the line correctly.
+    self._prompt_via_input = False
+    if self._eof:
+      return
+    if line_editing and self._stream is sys.stdin and self._stream.isatty():
+      self._prompt_via_input = True
+      self._start_input_thread()
+      return
+    try:
+      fd = self._stream.fileno()
+      self._loop.add_reader(fd, self._on_readable)
+      self._fd = fd
+    except (AttributeError, NotImplementedError, OSError, ValueError):
+      self._start_input_thread()
+
+  def __enter__(self) -> "AsyncLineReader":
+    return self
+
+  def __exit__(self, exc_type, exc, traceback) -> None:
+    self.close()
+
+  async def readline(self, prompt: str = "") -> str:
+    """Write ``prompt`` and return the next line of input."""
+    if prompt and not self._prompt_via_input:
+      self._output.write(prompt)
+      self._output.flush()
+    if self._requests is not None:
+      waiter = self._loop.create_future()
+      self._requests.put((prompt if self._prompt_via_input else "", waiter))
+      return await waiter
+
+    line = self._pop_line()
+    if line is not None:
+      return line
+    if self._eof:
+      raise EOFError
+    waiter = self._loop.create_future()
+    self._waiters.append(waiter)
+    return await waiter
+
+  def close(self) -> None:
+    """Unregister stdin from the loop and release the input thread."""
+    if self._fd is not None:
+      self._loop.remove_reader(self._fd)
+      self._fd = None
+    if self._requests is not None:
+      # A thread parked inside input() is a daemon, so it cannot hold up interpreter exit.
+      self._requests.put(None)
+      self._requests = None
+    self._eof = True
+    self._wake_waiters()
+
+  def _start_input_thread(self) -> None:
+    self._requests = queue.SimpleQueue()
+    threading.Thread(target=self._input_worker, args=(self._requests,), name="repl-input", daemon=True).start()
+
+  def _input_worker(self, requests: "queue.SimpleQueue[Optional[Tuple[str, asyncio.Future]]]") -> None:
+    while True:
+      request = requests.get()
+      if request is None:
+        return
+      prompt, waiter = request
+      try:
+        line, error = input(prompt), None
+      except BaseException as exc:  # pylint: disable=broad-except
+        line, error = None, exc
+      try:
+        self._loop.call_soon_threadsafe(_settle, waiter, line, error)
+      except RuntimeError:
+        return  # The loop closed while this thread waited on the terminal.
+
+  def _on_readable(self) -> None:
+    # Only called when data (or EOF) is pending, so this read does not block.
+    chunk = os.read(self._fd, 65536)
+    if chunk:
+      self._buffer += chunk
+    else:
+      self._eof = True
+      self._loop.remove_reader(self._fd)
+      self._fd = None
+    self._wake_waiters()
+
+  def _pop_line(self) -> Optional[str]:
+    end = self._buffer.find(b"\n")
+    if end < 0:
+      if not self._eof or not self._buffer:
+        return None
+      # Unterminated final line, as input() would return it.
+      end = len(self._buffer)
+    raw = bytes(self._buffer[:end])
+    del self._buffer[:end + 1]
+    return raw.decode(self._encoding, errors="replace").rstrip("\r")
+
+  def _wake_waiters(self) -> None:
+    while self._waiters:
+      waiter = self._waiters[0]
+      if waiter.done():
+        self._waiters.popleft()
+        continue
+      line = self._pop_line()
+      if line is None:
+        if not self._eof:
+          return
+        waiter.set_exception(EOFError())
+      else:
+        waiter.set_result(line)
+      self._waiters.popleft()
+
+
+def _settle(waiter: asyncio.Future, line: Optional[str], error: Optional[BaseException]) -> None:
+  if waiter.done():
+    return
+  if error is not None:
+    waiter.set_exception(error)
+  else:
+    waiter.set_result(line)
+
+
+__all__ = [
+  "AsyncLineReader",
+]
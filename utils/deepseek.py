@@ -4,17 +4,30 @@ Deepseek routing helpers shared across client variants.
 
 from __future__ import annotations
 
+import asyncio
 import json
 import re
-from typing import Dict, Optional
+import string
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
 
-import requests
+from utils import fastjson
+from utils.utils import TOOL_NAMES, ToolCall, log_color
 
-from utils.utils import ToolCall, log_color
+if TYPE_CHECKING:  # requests (and urllib3) load on the first API call, not at import
+  import requests
 
-DEEPSEEK_API_URL = "https://api.deepseek.com/chat/completions"
+try:
+  import ahocorasick
+except ModuleNotFoundError:  # pragma: no cover - optional dependency
+  ahocorasick = None  # type: ignore[assignment]
+
+DEEPSEEK_BASE_URL = "https://api.deepseek.com/"
+DEEPSEEK_API_URL = DEEPSEEK_BASE_URL + "chat/completions"
 DEFAULT_MODEL = "deepseek-chat"
-KNOWN_TICKERS = {
+KNOWN_TICKERS = frozenset({
   "AAPL",
   "MSFT",
   "GOOGL",
@@ -25,7 +38,7 @@ KNOWN_TICKERS = {
   "IBM",
   "ORCL",
   "NFLX",
-}
+})
 NAME_TO_TICKER = {
   "APPLE": "AAPL",
   "MICROSOFT": "MSFT",
@@ -41,6 +54,85 @@ NAME_TO_TICKER = {
   "NETFLIX": "NFLX",
 }
 
+# Every word that names a known symbol (ticker or company), mapped to its ticker.
+SYMBOL_WORDS = {**{ticker: ticker for ticker in KNOWN_TICKERS}, **NAME_TO_TICKER}
+SYMBOL_RE = re.compile(
+  r"\b(" + "|".join(sorted(map(re.escape, SYMBOL_WORDS), key=len, reverse=True)) + r")\b",
+  re.IGNORECASE,
+)
+COMPARE_RE = re.compile(r"\b(?:compare|vs|versus)\b", re.IGNORECASE)
+# Whole-prompt templates naming tickers outside KNOWN_TICKERS. Only the wording is case-insensitive:
+# the ticker must be typed in capitals (or after "$") so "price of gold" still goes to the model.
+PRICE_TEMPLATE_RE = re.compile(
+  r"(?i:(?:what(?:'s|\s+is)\s+)?(?:the\s+)?(?:current\s+)?(?:stock\s+|share\s+)?price\s+(?:of|for)\s+)"
+  r"(?:\$([A-Za-z]{1,5})|([A-Z]{1,5}))\s*\??"
+)
+COMPARE_TEMPLATE_RE = re.compile(
+  r"(?i:compare\s+)(?:\$([A-Za-z]{1,5})|([A-Z]{1,5}))"
+  r"(?i:\s+(?:and|vs\.?|versus|with|to)\s+)(?:\$([A-Za-z]{1,5})|([A-Z]{1,5}))\s*\??"
+)
+# Heuristic extraction patterns, run against the upper-cased prompt (the dollar one against the original).
+TICKER_TOKEN_RE = re.compile(r"\b[A-Z]{1,5}\b")
+COMPANY_NAME_RE = re.compile(
+  r"\b(" + "|".join(sorted(map(re.escape, NAME_TO_TICKER), key=len, reverse=True)) + r")\b"
+)
+DOLLAR_TICKER_RE = re.compile(r"\$([A-Za-z]{1,5})")
+
+def _build_name_automaton():
+  """Compile NAME_TO_TICKER into an Aho-Corasick automaton, or ``None`` without pyahocorasick."""
+  if ahocorasick is None:
+    return None
+  automaton = ahocorasick.Automaton()
+  for name, ticker in NAME_TO_TICKER.items():
+    automaton.add_word(name, (len(name), ticker))
+  automaton.make_automaton()
+  return automaton
+
+
+# One scan finds every company name regardless of how many names there are.
+COMPANY_NAME_AUTOMATON = _build_name_automaton()
+# While every name is a single word, a prompt's word tokens already contain every whole-word name match.
+_SINGLE_WORD_NAMES = all(name.isalnum() for name in NAME_TO_TICKER)
+# Maps every ASCII non-word character to a space, so ``split()`` yields the same tokens ``\b`` delimits.
+WORD_SPLIT_TABLE = str.maketrans({char: " " for char in string.punctuation.replace("_", "")})
+# Filler words dropped from route-cache keys; none of them names a symbol or a tool.
+ROUTE_STOPWORDS = frozenset({
+  "a", "an", "and", "are", "at", "can", "current", "currently", "do", "does", "for",
+  "give", "how", "i", "is", "it", "me", "much", "now", "of", "please", "s", "show",
+  "tell", "the", "to", "today", "what", "whats", "you",
+})
+# Deepseek rate-limits and occasionally 5xxs; retry those briefly before falling back to heuristics.
+# Connection and read failures are not retried so offline runs reach the fallback at once.
+DEEPSEEK_RETRY_OPTIONS: Dict[str, Any] = {
+  "total": 2,
+  "connect": 0,
+  "read": 0,
+  "backoff_factor": 0.2,
+  "status_forcelist": (429, 500, 502, 503, 504),
+  "allowed_methods": frozenset({"POST"}),
+}
+
+
+@lru_cache(maxsize=1024)
+def classify_keywords(prompt: str) -> Tuple[bool, Tuple[str, ...]]:
+  """Return ``(mentions_comparison, symbols_in_order)`` for ``prompt``; memoised per exact prompt."""
+  symbols = tuple(SYMBOL_WORDS[word.upper()] for word in SYMBOL_RE.findall(prompt))
+  return COMPARE_RE.search(prompt) is not None, symbols
+
+# The routing instructions never change, so the system message is built once and shared by every request.
+# It stays a plain dict (json cannot encode a mappingproxy); treat it as read-only.
+ROUTING_SYSTEM_MESSAGE: Dict[str, str] = {
+  "role": "system",
+  "content": (
+    "You are a routing assistant for a stock data toolset. "
+    "Map the user's prompt to either 'get_stock_price' or "
+    "'compare_stocks'. Always return JSON with keys "
+    "tool (string) and arguments (object). For get_stock_price "
+    "provide symbol. For compare_stocks provide symbol_one and "
+    "symbol_two. Symbols must be uppercase tickers."
+  ),
+}
+
 
 class DeepseekRouter:
   """
@@ -48,60 +140,249 @@ class DeepseekRouter:
 
   When a Deepseek API key is available the router requests a structured JSON
   response. Failures fall back to a deterministic heuristic so the user can
-  continue without external connectivity.
+  continue without external connectivity. Prompts that name exactly one known
+  symbol, or exactly two alongside a comparison word, are resolved by compiled
+  regexes without calling the API at all. Model decisions are cached per
+  normalised prompt (its lower-cased content words, ignoring punctuation,
+  filler words and order), so a repeated or reworded question skips the
+  round-trip.
   """
 
+  CACHE_SIZE = 256
+  # Matches the session's pool size, so batched routes never queue for a connection.
+  MAX_CONCURRENT_ROUTES = 4
+
   def __init__(self, api_key: Optional[str], model: str = DEFAULT_MODEL, debug: bool = True) -> None:
     self.api_key = api_key
     self.model = model
     self.debug = debug
+    self._headers = {
+      "Authorization": f"Bearer {api_key}",
+      "Content-Type": "application/json",
+    }
+    # Everything but the user prompt is fixed, so encode it once and splice the prompt in.
+    static_body = fastjson.dumps({
+      "model": model,
+      "response_format": {"type": "json_object"},
+      "messages": [ROUTING_SYSTEM_MESSAGE],
+    })
+    self._body_prefix = static_body[:-2] + b',{"role":"user","content":'
+    self._body_suffix = b"}]}"
+    # Created on first API call so keyless and subclassed routers never open one.
+    self._session: "Optional[requests.Session]" = None
+    # warm_up() may run on a background thread while the first prompt is routed.
+    self._session_lock = threading.Lock()
+    self._route_cache: "OrderedDict[str, ToolCall]" = OrderedDict()
+
+  def __enter__(self) -> "DeepseekRouter":
+    return self
+
+  def __exit__(self, exc_type, exc, traceback) -> None:
+    self.close()
+
+  def cache_clear(self) -> None:
+    """
+    Forget every cached model decision.
+    """
+    self._route_cache.clear()
+
+  def close(self) -> None:
+    """
+    Release the pooled HTTP connection, if one was opened.
+    """
+    if self._session is not None:
+      self._session.close()
+      self._session = None
+
+  def warm_up(self) -> None:
+    """
+    Open the pooled HTTPS connection ahead of the first prompt; failures are ignored.
+    """
+    if not self.api_key:
+      return
+    try:
+      # Any response leaves the TCP+TLS connection in the pool for the first real request.
+      self._http_session().head(DEEPSEEK_BASE_URL, timeout=5)
+    except Exception as exc:  # pylint: disable=broad-except
+      self._log_debug("[Router] Connection warm-up failed: %s", exc)
+
+  def _http_session(self) -> "requests.Session":
+    if self._session is not None:
+      return self._session
+    with self._session_lock:
+      if self._session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        session = requests.Session()
+        # Keep-alive means only the first prompt pays the TCP and TLS handshake.
+        session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=Retry(**DEEPSEEK_RETRY_OPTIONS)))
+        session.headers.update(self._headers)
+        self._session = session
+      return self._session
 
   def route(self, prompt: str) -> ToolCall:
     cleaned_prompt = prompt.strip()
     if not cleaned_prompt:
       raise ValueError("Query cannot be empty.")
 
-    self._log_debug(f"[Router] Received prompt: {cleaned_prompt}")
+    self._log_debug("[Router] Received prompt: %s", cleaned_prompt)
+
+    if not self.api_key:
+      self._log_debug("[Router] No Deepseek key detected; using heuristic classifier.")
+      return self._fallback_route(cleaned_prompt, source_label="heuristic_no_key")
+
+    fast_call = self._fast_route(cleaned_prompt)
+    if fast_call is not None:
+      return fast_call
+
+    key = self._cache_key(cleaned_prompt)
+    cached = self._cached_route(key)
+    if cached is not None:
+      return cached
+
+    try:
+      return self._remember_route(key, self._deepseek_route(cleaned_prompt))
+    except Exception as exc:  # pylint: disable=broad-except
+      self._log_debug("[Router] Deepseek routing failed (%s); reverting to heuristics.", exc)
+      return self._fallback_route(cleaned_prompt, source_label="heuristic_fallback")
+
+  async def route_async(self, prompt: str) -> ToolCall:
+    """
+    Awaitable counterpart of :meth:`route` that keeps the event loop free during the API call.
+    """
+    cleaned_prompt = prompt.strip()
+    if not cleaned_prompt:
+      raise ValueError("Query cannot be empty.")
+
+    self._log_debug("[Router] Received prompt: %s", cleaned_prompt)
 
     if not self.api_key:
       self._log_debug("[Router] No Deepseek key detected; using heuristic classifier.")
       return self._fallback_route(cleaned_prompt, source_label="heuristic_no_key")
 
+    fast_call = self._fast_route(cleaned_prompt)
+    if fast_call is not None:
+      return fast_call
+
+    key = self._cache_key(cleaned_prompt)
+    cached = self._cached_route(key)
+    if cached is not None:
+      return cached
+
     try:
-      return self._deepseek_route(cleaned_prompt)
+      return self._remember_route(key, await self._deepseek_route_async(cleaned_prompt))
     except Exception as exc:  # pylint: disable=broad-except
-      self._log_debug(f"[Router] Deepseek routing failed ({exc}); reverting to heuristics.")
+      self._log_debug("[Router] Deepseek routing failed (%s); reverting to heuristics.", exc)
       return self._fallback_route(cleaned_prompt, source_label="heuristic_fallback")
 
+  async def aroute_many(self, prompts: Sequence[str]) -> List[ToolCall]:
+    """
+    Route several prompts concurrently and return their tool calls in input order.
+
+    At most ``MAX_CONCURRENT_ROUTES`` prompts are routed at once, and repeats of
+    the same prompt within the batch share one route.
+    """
+    cleaned_prompts = [prompt.strip() for prompt in prompts]
+    if not all(cleaned_prompts):
+      raise ValueError("Query cannot be empty.")
+
+    limit = asyncio.Semaphore(self.MAX_CONCURRENT_ROUTES)
+
+    async def _route_one(prompt: str) -> ToolCall:
+      async with limit:
+        return await self.route_async(prompt)
+
+    shared: Dict[str, "asyncio.Future[ToolCall]"] = {}
+    for prompt in cleaned_prompts:
+      if prompt not in shared:
+        shared[prompt] = asyncio.ensure_future(_route_one(prompt))
+    await asyncio.gather(*shared.values())
+    # Repeated prompts get their own copy so callers cannot mutate each other's arguments.
+    return [
+      ToolCall(routed.name, dict(routed.arguments), source=routed.source)
+      for routed in (shared[prompt].result() for prompt in cleaned_prompts)
+    ]
+
+  def _fast_route(self, prompt: str) -> Optional[ToolCall]:
+    """Return a tool call for unambiguous prompts, or ``None`` to defer to the model."""
+    is_compare, symbols = classify_keywords(prompt)
+    if is_compare:
+      if len(symbols) == 2:
+        tool_call = ToolCall(
+          "compare_stocks",
+          {"symbol_one": symbols[0], "symbol_two": symbols[1]},
+          source="regex",
+        )
+      else:
+        tool_call = self._template_route(prompt)
+    elif symbols and len(set(symbols)) == 1:
+      tool_call = ToolCall("get_stock_price", {"symbol": symbols[0]}, source="regex")
+    elif not symbols:
+      tool_call = self._template_route(prompt)
+    else:
+      return None
+    if tool_call is None:
+      return None
+    self._log_debug("[Router] Regex fast path: %s with args %s", tool_call.name, tool_call.arguments)
+    return tool_call
+
+  @staticmethod
+  def _template_route(prompt: str) -> Optional[ToolCall]:
+    """Match "price of XYZ" / "compare XYZ and ABC" for tickers the symbol tables do not know."""
+    match = PRICE_TEMPLATE_RE.fullmatch(prompt)
+    if match is not None:
+      return ToolCall("get_stock_price", {"symbol": (match[1] or match[2]).upper()}, source="regex")
+    match = COMPARE_TEMPLATE_RE.fullmatch(prompt)
+    if match is not None:
+      return ToolCall(
+        "compare_stocks",
+        {"symbol_one": (match[1] or match[2]).upper(), "symbol_two": (match[3] or match[4]).upper()},
+        source="regex",
+      )
+    return None
+
+  @staticmethod
+  def _cache_key(prompt: str) -> str:
+    # Punctuation, spacing, filler words and repeats do not change the routing, so
+    # "AAPL price?" and "what's the AAPL price, price" share the key "aapl price". Word
+    # order is kept: it decides which symbol comes first in a comparison.
+    words = prompt.lower().translate(WORD_SPLIT_TABLE).split()
+    content_words = [word for word in dict.fromkeys(words) if word not in ROUTE_STOPWORDS]
+    return " ".join(content_words or words)
+
+  def _cached_route(self, key: str) -> Optional[ToolCall]:
+    cached = self._route_cache.get(key)
+    if cached is None:
+      return None
+    self._route_cache.move_to_end(key)
+    self._log_debug("[Router] Cache hit for prompt: %s", key)
+    # Hand out a copy so callers cannot mutate the cached arguments.
+    return ToolCall(cached.name, dict(cached.arguments), source=f"{cached.source}-cache")
+
+  def _remember_route(self, key: str, tool_call: ToolCall) -> ToolCall:
+    # The caller keeps ``tool_call``, so the cache holds its own copy of the arguments.
+    self._route_cache[key] = ToolCall(tool_call.name, dict(tool_call.arguments), source=tool_call.source)
+    if len(self._route_cache) > self.CACHE_SIZE:
+      self._route_cache.popitem(last=False)
+    return tool_call
+
+  async def _deepseek_route_async(self, prompt: str) -> ToolCall:
+    # Subclasses with a native async transport override this; the default borrows a thread.
+    return await asyncio.to_thread(self._deepseek_route, prompt)
+
   def _deepseek_route(self, prompt: str) -> ToolCall:
-    headers = {
-      "Authorization": f"Bearer {self.api_key}",
-      "Content-Type": "application/json",
-    }
-    payload = {
-      "model": self.model,
-      "response_format": {"type": "json_object"},
-      "messages": [
-        {
-          "role": "system",
-          "content": (
-            "You are a routing assistant for a stock data toolset. "
-            "Map the user's prompt to either 'get_stock_price' or "
-            "'compare_stocks'. Always return JSON with keys "
-            "tool (string) and arguments (object). For get_stock_price "
-            "provide symbol. For compare_stocks provide symbol_one and "
-            "symbol_two. Symbols must be uppercase tickers."
-          ),
-        },
-        {"role": "user", "content": prompt},
-      ],
-    }
-    self._log_debug(f"[Deepseek] Request payload: {json.dumps(payload, ensure_ascii=False)}")
+    body = self._body_prefix + fastjson.dumps(prompt) + self._body_suffix
+    if self.debug:
+      self._log_debug("[Deepseek] Request payload: %s", body.decode("utf-8"))
 
-    response = requests.post(DEEPSEEK_API_URL, headers=headers, json=payload, timeout=20)
+    # The session already sends the JSON content type.
+    response = self._http_session().post(DEEPSEEK_API_URL, data=body, timeout=20)
     response.raise_for_status()
-    data = response.json()
-    self._log_debug(f"[Deepseek] Raw response: {json.dumps(data, ensure_ascii=False)}")
+    data = fastjson.loads(response.content)
+    if self.debug:
+      self._log_debug("[Deepseek] Raw response: %s", fastjson.dumps_str(data))
 
     choices = data.get("choices") or []
     if not choices:
@@ -114,25 +395,26 @@ class DeepseekRouter:
         for chunk in content
       )
     try:
-      parsed = json.loads(content)
+      parsed = fastjson.loads(content)
     except json.JSONDecodeError as exc:
       raise ValueError("Deepseek response was not valid JSON.") from exc
 
     tool_name = parsed.get("tool")
     arguments = parsed.get("arguments")
-    if tool_name not in {"get_stock_price", "compare_stocks"} or not isinstance(arguments, dict):
+    if tool_name not in TOOL_NAMES or not isinstance(arguments, dict):
       raise ValueError("Deepseek response did not include a valid tool call.")
 
-    tool_call = ToolCall(tool_name, {key: str(value) for key, value in arguments.items()}, source="deepseek")
-    self._log_debug(f"[Deepseek] Routed to: {tool_call.name} with args {tool_call.arguments}")
+    tool_call = ToolCall(tool_name, arguments, source="deepseek")
+    self._log_debug("[Deepseek] Routed to: %s with args %s", tool_call.name, tool_call.arguments)
     return tool_call
 
   def _fallback_route(self, prompt: str, source_label: str = "heuristic") -> ToolCall:
-    lower_prompt = prompt.lower()
-    symbols = self._extract_symbols(prompt)
-    self._log_debug(f"[Router] Heuristic symbols detected: {symbols}")
+    # Case-folded once; both the symbol scan and the keyword checks reuse it.
+    upper_prompt = prompt.upper()
+    symbols = self._extract_symbols(prompt, upper_prompt)
+    self._log_debug("[Router] Heuristic symbols detected: %s", symbols)
 
-    if "compare" in lower_prompt or "vs" in lower_prompt or "versus" in lower_prompt:
+    if "COMPARE" in upper_prompt or "VS" in upper_prompt or "VERSUS" in upper_prompt:
       if len(symbols) < 2:
         raise ValueError("Could not determine two symbols to compare.")
       symbol_one, symbol_two = symbols[:2]
@@ -147,38 +429,72 @@ class DeepseekRouter:
 
     return ToolCall("get_stock_price", {"symbol": symbols[0]}, source=source_label)
 
-  def _extract_symbols(self, prompt: str) -> list[str]:
-    uppercase_tokens = re.findall(r"\b[A-Z]{1,5}\b", prompt.upper())
-    candidates = [token for token in uppercase_tokens if token in KNOWN_TICKERS]
-    if candidates:
-      return candidates
+  def _extract_symbols(self, prompt: str, upper_prompt: Optional[str] = None) -> list[str]:
+    if upper_prompt is None:
+      upper_prompt = prompt.upper()
+    word_tokens = upper_prompt.isascii()
+    if word_tokens:
+      # Plain-ASCII prompts split into exactly the regex's word tokens; set lookups suffice.
+      tokens = upper_prompt.translate(WORD_SPLIT_TABLE).split()
+    else:
+      tokens = TICKER_TOKEN_RE.findall(upper_prompt)
+    # isdisjoint scans every token in C, so prompts without a ticker skip the per-token Python loop.
+    if not KNOWN_TICKERS.isdisjoint(tokens):
+      return [token for token in tokens if token in KNOWN_TICKERS]
 
-    name_hits = []
-    upper_prompt = prompt.upper()
-    for name, ticker in NAME_TO_TICKER.items():
-      if re.search(rf"\b{re.escape(name)}\b", upper_prompt):
-        name_hits.append(ticker)
+    # dict.fromkeys de-duplicates the tickers while keeping prompt order.
+    if word_tokens and _SINGLE_WORD_NAMES:
+      name_hits = dict.fromkeys(NAME_TO_TICKER[token] for token in tokens if token in NAME_TO_TICKER)
+    else:
+      # One pass over the prompt finds every company name, whatever its length.
+      name_hits = dict.fromkeys(self._company_tickers(upper_prompt))
     if name_hits:
-      seen = set()
-      ordered = []
-      for ticker in name_hits:
-        if ticker not in seen:
-          seen.add(ticker)
-          ordered.append(ticker)
-      return ordered
-
-    dollar_tokens = re.findall(r"\$([A-Za-z]{1,5})", prompt)
-    return [token.upper() for token in dollar_tokens if token.isalpha()]
-
-  def _log_debug(self, message: str) -> None:
+      return list(name_hits)
+
+    return [token.upper() for token in DOLLAR_TICKER_RE.findall(prompt)]
+
+  @staticmethod
+  def _company_tickers(upper_prompt: str) -> list[str]:
+    """Tickers for every whole-word company name in ``upper_prompt``, in prompt order."""
+    if COMPANY_NAME_AUTOMATON is None:
+      return [NAME_TO_TICKER[name] for name in COMPANY_NAME_RE.findall(upper_prompt)]
+    tickers = []
+    last = len(upper_prompt) - 1
+    for end, (length, ticker) in COMPANY_NAME_AUTOMATON.iter(upper_prompt):
+      start = end - length + 1
+      # Automaton hits are substrings; keep only those standing on word boundaries like ``\b``.
+      if start > 0 and (upper_prompt[start - 1].isalnum() or upper_prompt[start - 1] == "_"):
+        continue
+      if end < last and (upper_prompt[end + 1].isalnum() or upper_prompt[end + 1] == "_"):
+        continue
+      tickers.append(ticker)
+    return tickers
+
+  def _log_debug(self, message: str, *args: object) -> None:
+    # %-style args are only formatted when debug output is on.
     if self.debug:
-      log_color(message, "d", prefix="[debug]")
+      log_color(message % args if args else message, "d", prefix="[debug]")
 
 
 __all__ = [
+  "COMPANY_NAME_AUTOMATON",
+  "COMPANY_NAME_RE",
+  "COMPARE_RE",
+  "COMPARE_TEMPLATE_RE",
   "DEEPSEEK_API_URL",
+  "DEEPSEEK_BASE_URL",
+  "DEEPSEEK_RETRY_OPTIONS",
   "DEFAULT_MODEL",
+  "DOLLAR_TICKER_RE",
   "KNOWN_TICKERS",
   "NAME_TO_TICKER",
+  "PRICE_TEMPLATE_RE",
+  "ROUTE_STOPWORDS",
+  "ROUTING_SYSTEM_MESSAGE",
+  "SYMBOL_RE",
+  "SYMBOL_WORDS",
+  "TICKER_TOKEN_RE",
+  "WORD_SPLIT_TABLE",
   "DeepseekRouter",
+  "classify_keywords",
 ]
@@ -0,0 +1,40 @@
+"""
+Event-loop selection for the asyncio entry points.
+
+``uvloop`` (``winloop`` on Windows) is used when installed; otherwise the stock
+asyncio loop is kept.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+
+if sys.platform == "win32":  # pragma: no cover - platform specific
+  try:
+    import winloop as uvloop
+  except ModuleNotFoundError:  # pragma: no cover - optional dependency
+    uvloop = None  # type: ignore[assignment]
+else:
+  try:
+    import uvloop
+  except ModuleNotFoundError:  # pragma: no cover - optional dependency
+    uvloop = None  # type: ignore[assignment]
+
+
+def install_uvloop() -> bool:
+  """
+  Make new event loops use uvloop when it is available.
+
+  Call before ``asyncio.run``/``anyio.run``; loops that already exist are not
+  affected. Returns ``True`` when the policy was switched.
+  """
+  if uvloop is None:
+    return False
+  asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+  return True
+
+
+__all__ = [
+  "install_uvloop",
+]
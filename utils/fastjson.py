@@ -0,0 +1,52 @@
+"""
+JSON helpers that use :mod:`orjson` when it is installed and fall back to :mod:`json`.
+
+``orjson.JSONDecodeError`` subclasses :class:`json.JSONDecodeError`, so callers can
+keep catching the stdlib exception regardless of which backend is active.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Union
+
+try:
+  import orjson
+except ModuleNotFoundError:  # pragma: no cover - optional dependency
+  orjson = None  # type: ignore[assignment]
+
+JSONInput = Union[str, bytes, bytearray, memoryview]
+
+
+def loads(data: JSONInput) -> Any:
+  """
+  Parse JSON from text or UTF-8 bytes.
+  """
+  if orjson is not None:
+    return orjson.loads(data)
+  if isinstance(data, memoryview):
+    data = data.tobytes()
+  return json.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+  """
+  Serialise ``obj`` to compact UTF-8 JSON bytes.
+  """
+  if orjson is not None:
+    return orjson.dumps(obj)
+  return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def dumps_str(obj: Any) -> str:
+  """
+  Serialise ``obj`` to a compact JSON string.
+  """
+  return dumps(obj).decode("utf-8")
+
+
+__all__ = [
+  "dumps",
+  "dumps_str",
+  "loads",
+]
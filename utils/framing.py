@@ -0,0 +1,108 @@
+"""
+Length-prefixed JSON framing for the raw stdio tool protocol.
+
+Each message is a 4-byte big-endian byte count followed by exactly that many
+bytes of UTF-8 JSON, so the reader does two fixed-size reads and never scans
+for a delimiter. A stream opens with :data:`FRAME_MAGIC` so a peer speaking a
+different framing is rejected at the handshake instead of misparsed.
+"""
+
+from __future__ import annotations
+
+import struct
+from typing import Any, BinaryIO, Optional
+
+from utils import fastjson
+
+# Pipe buffer size for both ends; a typical response fits in one read() syscall.
+PIPE_BUFFER_SIZE = 64 * 1024
+# Written once at the start of a stream; the trailing byte is the framing version.
+FRAME_MAGIC = b"SFR\x02"
+# Anything larger is a corrupt header rather than a real message.
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+FRAME_HEADER = struct.Struct(">I")
+
+
+def write_magic(stream: BinaryIO) -> None:
+  """
+  Announce the framing version at the start of ``stream``.
+  """
+  stream.write(FRAME_MAGIC)
+  stream.flush()
+
+
+def expect_magic(stream: BinaryIO) -> None:
+  """
+  Consume the framing announcement, raising :class:`ValueError` if it does not match.
+  """
+  magic = stream.read(len(FRAME_MAGIC))
+  if magic != FRAME_MAGIC:
+    raise ValueError(f"Unsupported framing: expected {FRAME_MAGIC!r}, got {magic!r}.")
+
+
+def write_frame(stream: BinaryIO, payload: Any) -> None:
+  """
+  Serialise ``payload`` and write it as one length-prefixed frame, then flush.
+  """
+  write_frame_bytes(stream, fastjson.dumps(payload))
+
+
+def write_frame_bytes(stream: BinaryIO, body: bytes) -> None:
+  """
+  Write an already-serialised JSON ``body`` as one length-prefixed frame, then flush.
+  """
+  stream.write(FRAME_HEADER.pack(len(body)) + body)
+  stream.flush()
+
+
+def read_frame(stream: BinaryIO, buffer: Optional[bytearray] = None) -> Optional[Any]:
+  """
+  Read and decode one frame; returns ``None`` at end of stream.
+
+  Long-lived readers can pass a ``buffer`` that is reused across calls: the body
+  is read into it with ``readinto`` and decoded from a view, so no per-frame
+  ``bytes`` object is allocated. It grows to fit the largest frame seen.
+
+  Raises :class:`ValueError` when the header is truncated or implausibly large or
+  the body is truncated, and :class:`json.JSONDecodeError` when the body is not
+  valid JSON.
+  """
+  header = stream.read(FRAME_HEADER.size)
+  if not header:
+    return None
+  if len(header) != FRAME_HEADER.size:
+    raise ValueError(f"Truncated frame header: {header!r}")
+  (size,) = FRAME_HEADER.unpack(header)
+  if size > MAX_FRAME_SIZE:
+    raise ValueError(f"Invalid frame header: {size} bytes exceeds the {MAX_FRAME_SIZE}-byte limit.")
+  if buffer is None:
+    body = stream.read(size)
+    if len(body) != size:
+      raise ValueError(f"Truncated frame: expected {size} bytes, got {len(body)}.")
+    return fastjson.loads(body)
+
+  if len(buffer) < size:
+    buffer.extend(bytes(size - len(buffer)))
+  # Views are released before returning so the buffer can still be resized next time.
+  with memoryview(buffer) as view, view[:size] as body_view:
+    received = 0
+    while received < size:
+      with body_view[received:] as remaining:
+        count = stream.readinto(remaining)
+      if not count:
+        raise ValueError(f"Truncated frame: expected {size} bytes, got {received}.")
+      received += count
+    return fastjson.loads(body_view)
+
+
+__all__ = [
+  "FRAME_HEADER",
+  "FRAME_MAGIC",
+  "MAX_FRAME_SIZE",
+  "PIPE_BUFFER_SIZE",
+  "expect_magic",
+  "read_frame",
+  "write_frame",
+  "write_frame_bytes",
+  "write_magic",
+]
@@ -4,9 +4,11 @@ Shared logging utilities, lifecycle helpers, and simple data classes.
 
 from __future__ import annotations
 
+import asyncio
+import os
 import sys
 from dataclasses import dataclass
-from typing import Dict
+from typing import Callable, Optional, TextIO, Union
 
 COLOR_CODES = {
   "g": "\033[32m",   # green
@@ -27,6 +29,25 @@ LIFECYCLE_STAGES = {
 }
 
 
+# Any non-empty NO_COLOR (https://no-color.org) drops the escape codes; spawned servers inherit it.
+COLOR_ENABLED = not os.environ.get("NO_COLOR")
+COLOR_RESET = "\033[0m" if COLOR_ENABLED else ""
+
+# Bound ``str.format`` per colour so each log line is one call with no lookups or concatenation.
+COLOR_FORMATS = {
+  color: ((code if COLOR_ENABLED else "") + "{} {}" + COLOR_RESET).format
+  for color, code in COLOR_CODES.items()
+}
+# Unknown colours render white; bound once so ``dict.get`` does not index the fallback on every call.
+DEFAULT_COLOR_FORMAT = COLOR_FORMATS["w"]
+
+# Pre-rendered "<colour><prefix> <label>: " heads so batched lifecycle lines skip the lookups.
+LIFECYCLE_HEADS = {
+  stage: f"{COLOR_CODES[color] if COLOR_ENABLED else ''}{prefix} {label}: "
+  for stage, (label, color, prefix) in LIFECYCLE_STAGES.items()
+}
+
+
 def log_color(
   message: str,
   color: str = "w",
@@ -38,12 +59,11 @@ def log_color(
   """
   Wrap a message in an ANSI colour code and optionally print it.
   """
-  colour_code = COLOR_CODES.get(color, COLOR_CODES["w"])
-  suffix = "\033[0m"
-  formatted = f"{colour_code}{prefix} {message}{suffix}"
+  formatted = COLOR_FORMATS.get(color, DEFAULT_COLOR_FORMAT)(prefix, message)
   if emit:
     stream = sys.stderr if use_stderr else sys.stdout
-    print(formatted, file=stream, flush=True)
+    stream.write(formatted + "\n")
+    stream.flush()
   return formatted
 
 
@@ -51,43 +71,180 @@ def log_lifecycle_event(stage: str, detail: str) -> None:
   """
   Emit a colour-coded lifecycle event for the client flows.
   """
-  label, color, prefix = LIFECYCLE_STAGES.get(stage, ("Event", "w", "[agent]"))
-  log_color(f"{label}: {detail}", color, prefix=prefix)
+  head = LIFECYCLE_HEADS.get(stage)
+  if head is None:
+    log_color(f"Event: {detail}")
+    return
+  sys.stdout.write(f"{head}{detail}{COLOR_RESET}\n")
+  sys.stdout.flush()
+
+
+class LifecycleBatch:
+  """
+  Collect one turn's log lines and write them in a single flush.
+
+  Use as a context manager around a REPL iteration; lines added with
+  :meth:`add` or :meth:`add_line` are emitted together when the block exits.
+  """
+
+  def __init__(self, stream: Optional[TextIO] = None, debug: bool = True) -> None:
+    self.stream = stream
+    self.debug = debug
+    self._lines: list[str] = []
+
+  def __enter__(self) -> "LifecycleBatch":
+    return self
+
+  def __exit__(self, exc_type, exc, traceback) -> None:
+    self.flush()
+
+  def add(self, stage: str, detail: str) -> None:
+    """
+    Queue a lifecycle event using the shared stage palette.
+    """
+    head = LIFECYCLE_HEADS.get(stage)
+    if head is None:
+      self.add_line(f"Event: {detail}")
+      return
+    self._lines.append(f"{head}{detail}{COLOR_RESET}")
+
+  def add_line(self, message: str, color: str = "w", prefix: str = "[agent]") -> None:
+    """
+    Queue an arbitrary coloured line; ``"d"`` lines are dropped when debug is off.
+    """
+    if color == "d" and not self.debug:
+      return
+    self._lines.append(log_color(message, color, prefix=prefix, emit=False))
+
+  def flush(self) -> None:
+    """
+    Write every queued line with one ``write`` and one ``flush``.
+    """
+    if not self._lines:
+      return
+    stream = self.stream or sys.stdout
+    stream.write("\n".join(self._lines) + "\n")
+    stream.flush()
+    self._lines.clear()
+
+
+LazyDetail = Union[str, Callable[[], str]]
+
+
+class AsyncLifecycleLogger:
+  """
+  Format and write lifecycle events on a background task.
 
+  :meth:`emit` only enqueues; ``detail`` may be a zero-argument callable so the
+  message is built off the caller's path. Await :meth:`join` before writing to
+  the terminal directly (prompts, errors) so output stays in order. Must be
+  created inside a running event loop.
+  """
 
-@dataclass
+  def __init__(self, maxsize: int = 256) -> None:
+    self._queue: "asyncio.Queue[tuple[str, LazyDetail]]" = asyncio.Queue(maxsize)
+    self._task = asyncio.get_running_loop().create_task(self._drain())
+
+  def emit(self, stage: str, detail: LazyDetail) -> None:
+    """
+    Queue a lifecycle event; writes synchronously if the queue is full.
+    """
+    try:
+      self._queue.put_nowait((stage, detail))
+    except asyncio.QueueFull:
+      self._write(stage, detail)
+
+  async def join(self) -> None:
+    """
+    Wait until every queued event has been written.
+    """
+    await self._queue.join()
+
+  async def aclose(self) -> None:
+    """
+    Flush pending events and stop the writer task.
+    """
+    await self._queue.join()
+    self._task.cancel()
+    try:
+      await self._task
+    except asyncio.CancelledError:
+      pass
+
+  async def _drain(self) -> None:
+    while True:
+      stage, detail = await self._queue.get()
+      try:
+        self._write(stage, detail)
+      except Exception as exc:  # pylint: disable=broad-except
+        # A failing formatter must not kill the writer, or join() would hang.
+        log_color(f"⚠️  {exc}", "r", prefix="[error]")
+      finally:
+        self._queue.task_done()
+
+  @staticmethod
+  def _write(stage: str, detail: LazyDetail) -> None:
+    log_lifecycle_event(stage, detail() if callable(detail) else detail)
+
+
+# Every tool a router may select; responses naming anything else are rejected.
+TOOL_NAMES = frozenset({"get_stock_price", "compare_stocks"})
+
+
+@dataclass(frozen=True, slots=True)
 class ToolCall:
   """
   Normalised representation of a tool invocation determined by the router.
+
+  Instances are immutable and carry no per-instance ``__dict__``; routers that
+  cache a decision still hand out copies because ``arguments`` is a plain dict.
   """
 
   name: str
-  arguments: Dict[str, str]
+  arguments: dict[str, object]
   source: str = "unknown"
 
 
-def render_result(tool_call: ToolCall, result: Dict[str, object]) -> str:
+def _render_price(data: dict[str, object]) -> str:
+  symbol = data.get("symbol", "UNKNOWN")
+  price = data.get("price", "?")
+  source = data.get("source", "unknown")
+  return f"The current price of {symbol} is ${price} ({source})."
+
+
+def _render_comparison(data: dict[str, object]) -> str:
+  return data.get("summary", "Comparison data unavailable.")
+
+
+# Tool name -> renderer of that tool's ``data`` payload; unknown tools get a fixed message.
+RESULT_RENDERERS: dict[str, Callable[[dict[str, object]], str]] = {
+  "get_stock_price": _render_price,
+  "compare_stocks": _render_comparison,
+}
+
+
+def render_result(tool_call: ToolCall, result: dict[str, object]) -> str:
   """
   Convert a tool response into a human-readable message.
   """
-  if tool_call.name == "get_stock_price":
-    data = result.get("data") or {}
-    symbol = data.get("symbol", "UNKNOWN")
-    price = data.get("price", "?")
-    source = data.get("source", "unknown")
-    return f"The current price of {symbol} is ${price} ({source})."
-
-  if tool_call.name == "compare_stocks":
-    data = result.get("data") or {}
-    summary = data.get("summary", "Comparison data unavailable.")
-    return summary
-
-  return "Received an unexpected tool response."
+  renderer = RESULT_RENDERERS.get(tool_call.name)
+  if renderer is None:
+    return "Received an unexpected tool response."
+  return renderer(result.get("data") or {})
 
 
 __all__ = [
+  "AsyncLifecycleLogger",
   "COLOR_CODES",
+  "COLOR_ENABLED",
+  "COLOR_FORMATS",
+  "COLOR_RESET",
+  "DEFAULT_COLOR_FORMAT",
+  "LIFECYCLE_HEADS",
   "LIFECYCLE_STAGES",
+  "LifecycleBatch",
+  "RESULT_RENDERERS",
+  "TOOL_NAMES",
   "ToolCall",
   "log_color",
   "log_lifecycle_event",